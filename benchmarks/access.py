@@ -0,0 +1,161 @@
+"""
+Microbenchmark comparing trail conversion with the table-driven seasonal access engine
+in usfs_to_osm.trails against the year-round-only foot, bicycle and horse access tags
+that the trails converter used to have.
+
+Run from the repository root:
+
+    python benchmarks/access.py
+
+Both convert fixed corpora of random trails the way the CLI does (decoding each
+feature, converting it with the specialized converter, and encoding the result), and
+the median of several runs is reported. Every run starts with empty caches, so it
+includes parsing the date ranges. Trails in the same area share their seasons, so the
+first corpus's access columns are drawn from a pool of random access profiles (each
+column taking one of a few real-looking date ranges); in the second, the worst case,
+every trail's are different. The target is for the engine to add less than 20% to the
+time taken on the first; this is reported, not enforced, since timings on a busy
+machine vary too much for a pass/fail check.
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from usfs_to_osm import codec, schema, stats, trails
+
+
+LEGACY_MODES = ("foot", "bicycle", "horse")
+
+TARGET_OVERHEAD = 0.2
+
+
+def legacy_access_tags_for_mode(mode, props, access_values):
+    managed, accepted_or_discouraged, restricted = access_values[mode](props)
+
+    tags = {}
+
+    if managed == "01/01-12/31":
+        tags[mode] = "designated"
+    elif accepted_or_discouraged == "01/01-12/31":
+        tags[mode] = "yes"
+    elif restricted == "01/01-12/31":
+        tags[mode] = "no"
+
+    return tags
+
+
+def legacy_properties_to_osm(props, access_values):
+    tags = {}
+    tags["TRAIL_NAME"] = props["TRAIL_NAME"]
+    tags["TRAIL_NO"] = props["TRAIL_NO"]
+
+    tags["highway"] = trails.highway(props)
+    tags["name"] = trails.name(props)
+    tags["ref"] = trails.ref(props)
+    tags["operator"] = trails.operator(props)
+
+    for mode in LEGACY_MODES:
+        tags |= legacy_access_tags_for_mode(mode, props, access_values)
+
+    return tags
+
+
+RANGES = [None, None, None, "01/01-12/31", "06/15-10/31", "12/01-03/31", "05/01-06/30,09/01-10/31"]
+NAMES = ["MT BALDY/LK TR", "Upper 3rd Loop", "N FK BEAR CK", "PCT", "UNNAMED"]
+NUMBERS = ["T101", "1234", "O-77", "5001A"]
+
+
+def corpus(size, profiles, seed=1):
+    rng = random.Random(seed)
+    access = [
+        {column: rng.choice(RANGES) for column in trails.ALL_ACCESS_COLUMNS}
+        for _ in range(profiles)
+    ]
+    return [
+        codec.dumps({
+            "type": "Feature",
+            "properties": {
+                "TRAIL_NAME": rng.choice(NAMES),
+                "TRAIL_NO": rng.choice(NUMBERS),
+                "TRAIL_TYPE": rng.choice(["TERRA", "TERRA", "SNOW"]),
+                "ALLOWED_TERRA_USE": rng.choice([None, "1", "123", "12345", "123456"]),
+                **rng.choice(access),
+            },
+            "geometry": {
+                "type": "LineString",
+                "coordinates": [
+                    [rng.uniform(-111, -110), rng.uniform(39, 40)] for _ in range(30)
+                ],
+            },
+        })
+        for _ in range(size)
+    ]
+
+
+def converter(properties_to_osm, access_values):
+    def convert(line):
+        feature = codec.loads(line)
+        feature["properties"] = properties_to_osm(feature["properties"], access_values)
+        return codec.dumps(feature)
+
+    return convert
+
+
+def clear_caches():
+    # so every run parses its date ranges and builds its access tags from scratch
+    for cached in stats.caches.values():
+        cached.cache_clear()
+
+
+def bench(variants, lines, repeat=15):
+    """
+    Times each (label, function) over lines, alternating between them (so they see
+    the same background load), and returns the median rates in trails/s
+    """
+    times = {label: [] for label, _ in variants}
+    for _ in range(repeat):
+        for label, function in variants:
+            clear_caches()
+            start = time.perf_counter()
+            for line in lines:
+                function(line)
+            times[label].append(time.perf_counter() - start)
+
+    rates = []
+    for label, _ in variants:
+        rate = len(lines) / statistics.median(times[label])
+        print(f"  {label:<16} {rate:>12,.0f} trails/s")
+        rates.append(rate)
+    return rates
+
+
+def main():
+    # the same corpora every run: trails sharing 1000 access profiles, as trails in the
+    # same area share their seasons, and (the worst case) every trail's distinct
+    for profiles in (1000, 20000):
+        lines = corpus(20000, profiles)
+        columns = list(codec.loads(lines[0])["properties"])
+        legacy_values = {
+            mode: schema.getter(columns, trails.ACCESS_COLUMNS[mode]) for mode in LEGACY_MODES
+        }
+        access_values = schema.getter(columns, trails.ALL_ACCESS_COLUMNS)
+
+        print(f"trails ({len(lines)} features, {profiles} access profiles, {codec.describe()}):")
+        before, after = bench(
+            [
+                ("year-round only", converter(legacy_properties_to_osm, legacy_values)),
+                ("seasonal access", converter(trails.properties_to_osm, access_values)),
+            ],
+            lines,
+        )
+        overhead = before / after - 1
+        print(f"  overhead: {overhead:.1%} (target: under {TARGET_OVERHEAD:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Microbenchmark comparing usfs_to_osm.names.NameNormalizer with the per-token regex
+implementation of name() that the trails and recsites converters used to have.
+
+Run from the repository root:
+
+    python benchmarks/names.py
+
+Each normalizer is run (without the converters' LRU cache) over a corpus of names
+built from real-looking trail and recreation site names, and its output is checked
+against the old implementation's.
+"""
+
+import itertools
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from usfs_to_osm import recsites, trails
+
+
+# The old implementations matched these one at a time (and with a POSIX character
+# class that Python doesn't support, which is fixed here for the comparison)
+LEGACY_BAD_NAME_PATTERNS = {"^NFST-\\d+"}
+
+
+def squeeze(string):
+    return " ".join(string.split())
+
+
+def legacy_trail_name(name, id):
+    if not name or id in name or name in trails.BAD_NAMES:
+        return None
+
+    if any(re.match(regex, name) for regex in LEGACY_BAD_NAME_PATTERNS):
+        return None
+
+    name = squeeze(name.replace("/", " / ")).strip()
+
+    if name.isnumeric():
+        return None
+
+    words = []
+    for token in re.findall(r"\s|[\w\'.]+|[^\w\'.]+", name):
+        if token.isspace() or re.match("^[()-/]$", token):
+            words.append(token)
+            continue
+
+        word = token.upper()
+        if word in trails.BAD_WORDS:
+            continue
+
+        if word == "-":
+            words.append(word)
+            continue
+
+        abbr = trails.ABBREVIATIONS.get(word) or trails.ABBREVIATIONS.get(word.replace(".", ""))
+        if abbr:
+            word = abbr
+        elif word in trails.SPECIAL_CASES:
+            word = trails.SPECIAL_CASES[word]
+        elif re.match("[\\w']+", word):
+            word = word.capitalize()
+
+        words.append(word)
+
+    if not words:
+        return None
+
+    if not any(val in words for val in ["Road", "Trail", "Connector", "Tie", "Loop", "Spur"]):
+        words += [" ", "Trail"]
+
+    if words[0].islower():
+        words[0] = words[0].capitalize()
+    if words[-1].islower():
+        words[-1] = words[-1].capitalize()
+
+    return "".join(words)
+
+
+def legacy_recsite_name(name):
+    if not name or name in recsites.BAD_NAMES:
+        return None
+
+    if any(re.match(regex, name) for regex in LEGACY_BAD_NAME_PATTERNS):
+        return None
+
+    name = squeeze(name.replace("/", " / ")).strip()
+
+    if name.isnumeric():
+        return None
+
+    words = []
+    for token in re.findall(r"\s|[A-Za-z\'.]+|[^A-Za-z\'.]+", name):
+        if token.isspace() or re.match("^[()-/]$", token):
+            words.append(token)
+            continue
+
+        if re.match("^#\\d+$", token):
+            continue
+
+        word = token.upper()
+        if word in recsites.BAD_WORDS:
+            continue
+
+        if word == "-":
+            words.append(word)
+            continue
+
+        abbr = recsites.ABBREVIATIONS.get(word) or recsites.ABBREVIATIONS.get(word.replace(".", ""))
+        if abbr:
+            word = abbr
+        elif word in recsites.SPECIAL_CASES:
+            word = recsites.SPECIAL_CASES[word]
+        elif re.match("[\\w']+", word):
+            word = word.capitalize()
+
+        words.append(word)
+
+    if not words:
+        return None
+
+    if not "Trailhead" in words:
+        words += [" ", "Trailhead"]
+
+    if words[0].islower():
+        words[0] = words[0].capitalize()
+    if words[-1].islower():
+        words[-1] = words[-1].capitalize()
+
+    return "".join(words)
+
+
+FIRST = ["BEAR", "N FK", "MT BALDY", "SO LK", "PINE", "LOWER", "UPPER", "I.T.", "BIG CYN", "3RD"]
+SECOND = ["CK", "CRK", "RIDGE", "LOOP", "TIE", "OHV", "PCT", "CONNECTOR", "OF THE PINES", "/ LKS"]
+THIRD = ["TR", "TRAIL", "TH", "#2", "(FDR)", "", "TRAILHEAD", "XC SKI TR", "SPUR", "RD"]
+
+CORPUS = [" ".join(filter(None, words)) for words in itertools.product(FIRST, SECOND, THIRD)]
+CORPUS += ["UNNAMED", "NO NAME", "1234", "NFST-123", ""]
+
+
+def bench(label, function, args):
+    number = 20
+    seconds = min(timeit.repeat(lambda: [function(*a) for a in args], number=number, repeat=5))
+    rate = len(args) * number / seconds
+    print(f"  {label:<16} {rate:>12,.0f} names/s")
+    return rate
+
+
+def main():
+    for dataset, legacy, new, args in [
+        ("trails", legacy_trail_name, trails.NAME_NORMALIZER, [(n, "T101") for n in CORPUS]),
+        ("recsites", legacy_recsite_name, recsites.NAME_NORMALIZER, [(n,) for n in CORPUS]),
+    ]:
+        mismatches = [a for a in args if legacy(*a) != new(*a)]
+        if mismatches:
+            sys.exit(f"{dataset}: normalizer differs from the old name() for {mismatches[:5]}")
+
+        print(f"{dataset} ({len(args)} distinct names):")
+        before = bench("per-token regex", legacy, args)
+        after = bench("NameNormalizer", new, args)
+        print(f"  speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import unittest
+
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+from usfs_to_osm import clip
+
+
+def feature(geometry_type, coordinates):
+    return {"type": "Feature", "properties": {}, "geometry": {"type": geometry_type, "coordinates": coordinates}}
+
+
+@unittest.skipIf(shapely is None, "clipping needs shapely")
+class ClipLinesTest(unittest.TestCase):
+    def setUp(self):
+        self.clipper = clip.Clipper(shapely.box(0, 0, 1, 1), clip_lines=True)
+
+    def clip(self, *features):
+        return [f["geometry"] for f in self.clipper.filter_batch(list(features))]
+
+    def test_line_touching_boundary(self):
+        # leaves the square and comes back to touch its corner, so the intersection is
+        # a GeometryCollection of a LineString and a Point
+        line = feature("LineString", [[0.5, 0.5], [1.5, 0.5], [1.5, 1.5], [1, 1]])
+        self.assertEqual(
+            self.clip(line), [{"type": "LineString", "coordinates": [[0.5, 0.5], [1.0, 0.5]]}]
+        )
+
+    def test_line_only_touching_boundary(self):
+        line = feature("LineString", [[2, 0.5], [1, 0.5], [2, 0.2]])
+        self.assertEqual(self.clip(line), [])
+
+    def test_line_crossing_twice(self):
+        line = feature("LineString", [[0.5, 0.5], [1.5, 0.5], [1.5, 0.7], [0.5, 0.7]])
+        self.assertEqual(
+            self.clip(line),
+            [{
+                "type": "MultiLineString",
+                "coordinates": [[[0.5, 0.5], [1.0, 0.5]], [[1.0, 0.7], [0.5, 0.7]]],
+            }],
+        )
+
+    def test_points_on_boundary_kept(self):
+        point = feature("Point", [1, 1])
+        self.assertEqual(self.clip(point), [point["geometry"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import datetime
+import unittest
+
+from usfs_to_osm import codec
+
+
+class DumpsTest(unittest.TestCase):
+    def tearDown(self):
+        codec.select()
+
+    def test_datetime_properties(self):
+        # GDAL reads date columns as datetimes, and --dump-input writes them out
+        feature = {"properties": {"DATE": datetime.datetime(2020, 5, 1, 12, 30)}}
+        for backend in codec.BACKENDS:
+            with self.subTest(backend=backend):
+                codec.select(backend)
+                dumped = codec.loads(codec.dumps(feature))
+                self.assertTrue(dumped["properties"]["DATE"].startswith("2020-05-01"))
+
+    def test_compact(self):
+        for backend in codec.BACKENDS:
+            with self.subTest(backend=backend):
+                codec.select(backend)
+                self.assertEqual(codec.dumps({"a": [1, 2]}), b'{"a":[1,2]}')
+
+
+if __name__ == "__main__":
+    unittest.main()
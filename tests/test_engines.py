@@ -0,0 +1,102 @@
+"""
+The columnar roads converter must give exactly the same tags as the per-feature one.
+"""
+
+import itertools
+import unittest
+
+from usfs_to_osm import batches, merge, roads
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+def road_rows():
+    """Rows covering every mapped value of each template column, plus nulls and junk"""
+    surfaces = [*roads.SURFACE_MAP, None, "OTHER"]
+    smoothness = [*roads.SMOOTHNESS_MAP, None, "OTHER"]
+    ids = ["0010000", "0012000", "0012345", "12", "0012A", "", None]
+    names = ["BEAR CK", "NO NAME", "FR 123", "0012000 SPUR", None]
+    rows = []
+    for i, (surface, level) in enumerate(itertools.product(surfaces, smoothness)):
+        rows.append({
+            "ID": ids[i % len(ids)] or "001",
+            "NAME": names[i % len(names)],
+            "FUNCTIONAL_CLASS": ["A - ARTERIAL", "L - LOCAL", None][i % 3],
+            "JURISDICTION": ["FS - FOREST SERVICE", "C - COUNTY", None][i % 3],
+            "SURFACE_TYPE": surface,
+            "OPER_MAINT_LEVEL": level,
+            "LANES": ["1 - SINGLE LANE", "2 - DOUBLE LANE", "X", None][i % 4],
+            "OBJECTIVE_MAINT_LEVEL": ["D - DECOMMISSION", "2 - HIGH CLEARANCE VEHICLES", None][i % 3],
+            "OPENFORUSETO": ["ALL", "HIGH CLEARANCE", None][i % 3],
+            "BMP": [0.0, "1.5", 2, None][i % 4],
+            "EMP": [1.0, "2.5", 3, None][i % 4],
+        })
+    # IDs of each length, including ones that are null in the template columns
+    for id in ids:
+        if id:
+            rows.append({"ID": id, "NAME": None})
+    return rows
+
+
+@unittest.skipIf(pa is None, "the columnar engine needs pyarrow")
+class ColumnarEngineTest(unittest.TestCase):
+    def assert_same_tags(self, rows, table):
+        expected = [roads.properties_to_osm(row) for row in rows]
+        actual = roads.columns_to_osm(table)
+        self.assertEqual(len(actual), len(expected))
+        for row, want, got in zip(rows, expected, actual):
+            self.assertEqual(list(got.items()), list(want.items()), row)
+
+    def test_all_columns(self):
+        rows = road_rows()
+        columns = list(rows[0])
+        table = pa.table({
+            name: pa.array(
+                [None if row.get(name) is None else str(row[name]) for row in rows],
+                pa.string(),
+            )
+            for name in columns
+        })
+        self.assertGreater(len(rows), len(roads.SURFACE_MAP) * len(roads.SMOOTHNESS_MAP))
+        self.assert_same_tags(rows, table)
+
+    def test_record_batch(self):
+        rows = road_rows()
+        table = pa.RecordBatch.from_pylist(
+            [{k: v for k, v in row.items() if k not in ("BMP", "EMP")} for row in rows]
+        )
+        self.assert_same_tags(rows, table)
+
+    def test_missing_optional_columns(self):
+        rows = [
+            {"ID": row["ID"], "NAME": row["NAME"], "SURFACE_TYPE": row.get("SURFACE_TYPE")}
+            for row in road_rows()
+        ]
+        table = pa.RecordBatch.from_pylist(rows)
+        self.assert_same_tags(rows, table)
+
+    def test_features_with_mixed_mileposts(self):
+        # from newline-delimited GeoJSON, where BMP/EMP may be numbers or strings
+        rows = road_rows()
+        features = [
+            {"type": "Feature", "properties": row, "geometry": None} for row in rows
+        ]
+        expected = [
+            merge.convert_segment(roads.feature_to_osm, "ID", {**feature, "properties": {**row}})
+            for feature, row in zip(features, rows)
+        ]
+        actual = list(
+            batches.convert_features(roads.columns_to_osm, features, 16, segment_id="ID")
+        )
+        self.assertEqual(
+            [(id, bmp, list(f["properties"].items())) for id, bmp, f in actual],
+            [(id, bmp, list(f["properties"].items())) for id, bmp, f in expected],
+        )
+        self.assertIn(1.5, [bmp for _, bmp, _ in actual])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from usfs_to_osm import merge
+
+
+def segment(id, bmp, coordinates, geometry_type="LineString", tags=None):
+    if geometry_type == "MultiLineString":
+        coordinates = [coordinates]
+    feature = {
+        "type": "Feature",
+        "properties": tags or {"highway": "track", "ref": "FR " + id},
+        "geometry": {"type": geometry_type, "coordinates": coordinates},
+    }
+    return id, bmp, feature
+
+
+class MergeSegmentsTest(unittest.TestCase):
+    def test_linestrings(self):
+        ways = list(merge.merge_segments([
+            segment("1", 1.0, [[1, 0], [2, 0]]),
+            segment("1", 0.0, [[0, 0], [1, 0]]),
+            segment("2", 0.0, [[5, 5], [6, 6]]),
+        ]))
+        self.assertEqual(
+            [way["geometry"] for way in ways],
+            [
+                {"type": "LineString", "coordinates": [[0, 0], [1, 0], [2, 0]]},
+                {"type": "LineString", "coordinates": [[5, 5], [6, 6]]},
+            ],
+        )
+
+    def test_single_part_multilinestrings(self):
+        # as GDAL reads the FS geodatabases' polylines
+        ways = list(merge.merge_segments([
+            segment("1", 0.0, [[0, 0], [1, 0]], "MultiLineString"),
+            segment("1", 2.0, [[3, 0], [2, 0]], "MultiLineString"),
+            segment("1", 1.0, [[1, 0], [2, 0]], "MultiLineString"),
+            segment("2", 0.0, [[5, 5], [6, 6]], "MultiLineString"),
+            segment("2", 1.0, [[6, 6], [7, 7]], "MultiLineString"),
+        ]))
+        self.assertEqual(
+            [way["geometry"] for way in ways],
+            [
+                {"type": "MultiLineString", "coordinates": [[[0, 0], [1, 0], [2, 0], [3, 0]]]},
+                {"type": "MultiLineString", "coordinates": [[[5, 5], [6, 6], [7, 7]]]},
+            ],
+        )
+
+    def test_multi_part_multilinestrings_pass_through(self):
+        multi_part = {
+            "type": "Feature",
+            "properties": {"highway": "track"},
+            "geometry": {
+                "type": "MultiLineString",
+                "coordinates": [[[1, 0], [2, 0]], [[3, 0], [4, 0]]],
+            },
+        }
+        ways = list(merge.merge_segments([
+            segment("1", 0.0, [[0, 0], [1, 0]], "MultiLineString"),
+            ("1", 1.0, multi_part),
+        ]))
+        self.assertEqual(len(ways), 2)
+        self.assertIs(ways[0], multi_part)
+
+    def test_different_tags_not_merged(self):
+        ways = list(merge.merge_segments([
+            segment("1", 0.0, [[0, 0], [1, 0]], tags={"highway": "track"}),
+            segment("1", 1.0, [[1, 0], [2, 0]], tags={"highway": "unclassified"}),
+        ]))
+        self.assertEqual(len(ways), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
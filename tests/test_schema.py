@@ -0,0 +1,77 @@
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from usfs_to_osm import roads, schema, trails
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def road(**props):
+    return {
+        "type": "Feature",
+        "properties": {"ID": "0012000", "NAME": "BEAR CK", **props},
+        "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]},
+    }
+
+
+# newline-delimited GeoJSON features needn't all have the same properties
+HETEROGENEOUS_ROADS = [
+    road(SURFACE_TYPE="AC - ASPHALT", OPER_MAINT_LEVEL="4 - MODERATE DEGREE OF USER COMFORT"),
+    road(),
+    road(OPER_MAINT_LEVEL="2 - HIGH CLEARANCE VEHICLES", LANES="1 - SINGLE LANE"),
+]
+
+
+class GetterTest(unittest.TestCase):
+    def test_fixed(self):
+        get = schema.getter(["A", "B"], ("A", "B", "C"), fixed=True)
+        self.assertEqual(get({"A": 1, "B": 2}), (1, 2, None))
+
+    def test_not_fixed(self):
+        get = schema.getter(["A", "B"], ("A", "B", "C"))
+        self.assertEqual(get({"B": 2, "C": 3}), (None, 2, 3))
+        self.assertEqual(pickle.loads(pickle.dumps(get))({"A": 1}), (1, None, None))
+
+    def test_specialized_converters(self):
+        columns = list(HETEROGENEOUS_ROADS[0]["properties"])
+        convert = roads.specialize(columns)
+        for feature in HETEROGENEOUS_ROADS:
+            self.assertEqual(
+                convert({**feature})["properties"], roads.properties_to_osm(feature["properties"])
+            )
+
+        props = {"TRAIL_NAME": "BEAR CK", "TRAIL_NO": "T101", "BICYCLE_MANAGED": "01/01-12/31"}
+        convert = trails.specialize(list(props))
+        later = {"TRAIL_NAME": "BEAR CK", "TRAIL_NO": "T101", "HIKER_PEDESTRIAN_MANAGED": "01/01-12/31"}
+        self.assertEqual(
+            convert({"properties": later})["properties"], trails.properties_to_osm(later)
+        )
+
+
+class HeterogeneousInputTest(unittest.TestCase):
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "roads.ndjson")
+            with open(path, "w") as f:
+                for feature in HETEROGENEOUS_ROADS:
+                    f.write(json.dumps(feature) + "\n")
+
+            for workers in ("1", "2"):
+                result = subprocess.run(
+                    [sys.executable, os.path.join(ROOT, "roads-to-osm.py"), "-j", workers, path],
+                    capture_output=True,
+                    check=True,
+                )
+                tags = [json.loads(line)["properties"] for line in result.stdout.splitlines()]
+                self.assertEqual(
+                    tags, [roads.properties_to_osm(f["properties"]) for f in HETEROGENEOUS_ROADS]
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from usfs_to_osm import trails
+
+
+def access(managed=None, accepted_or_discouraged=None, restricted=None, mode="foot"):
+    return list(trails.mode_access(mode, (managed, accepted_or_discouraged, restricted)))
+
+
+class AccessTest(unittest.TestCase):
+    def test_year_round(self):
+        self.assertEqual(access("01/01-12/31"), [("foot", "designated")])
+        self.assertEqual(access(None, "01/01-12/31"), [("foot", "yes")])
+        self.assertEqual(access("01/01-06/30,07/01-12/31"), [("foot", "designated")])
+
+    def test_seasonal(self):
+        self.assertEqual(
+            access(None, "06/15-10/31", "12/01-03/31"),
+            [("foot:conditional", "no @ (Dec 01-Mar 31); yes @ (Jun 15-Oct 31)")],
+        )
+        self.assertEqual(
+            access("05/01-10/31", None, "01/01-12/31", mode="bicycle"),
+            [("bicycle", "no"), ("bicycle:conditional", "designated @ (May 01-Oct 31)")],
+        )
+
+    def test_rest_of_year(self):
+        # restricted whenever it isn't managed
+        self.assertEqual(
+            access("05/01-10/31", None, "11/01-04/30"),
+            [("foot", "no"), ("foot:conditional", "designated @ (May 01-Oct 31)")],
+        )
+
+    def test_hidden_ranges_dropped(self):
+        self.assertEqual(
+            access("05/01-10/31", "05/01-10/31", "05/01-10/31"),
+            [("foot:conditional", "designated @ (May 01-Oct 31)")],
+        )
+        self.assertEqual(
+            access("05/01-06/30,09/01-10/31", "06/15-10/31", "01/01-12/31"),
+            [
+                ("foot", "no"),
+                (
+                    "foot:conditional",
+                    "yes @ (Jul 01-Aug 31); designated @ (May 01-Jun 30,Sep 01-Oct 31)",
+                ),
+            ],
+        )
+
+    def test_invalid_ranges_ignored(self):
+        self.assertEqual(access("02/30-03/01", "sometimes"), [])
+
+    def test_key_order(self):
+        props = dict.fromkeys(trails.ALL_ACCESS_COLUMNS, "01/01-12/31")
+        self.assertEqual(
+            list(trails.access_tags(props)),
+            ["foot", "bicycle", "horse", "motorcycle", "atv", "motorcar", "snowmobile"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
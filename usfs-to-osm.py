@@ -0,0 +1,9 @@
+"""
+Converts USFS roads, trails and recreation sites data to an OSM-compatible schema.
+Run with --help for the list of commands.
+"""
+
+from usfs_to_osm.cli import command_main
+
+if __name__ == "__main__":
+    command_main()
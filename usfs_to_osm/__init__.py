@@ -0,0 +1,64 @@
+"""
+Converts USFS roads, trails and recreation sites data to an OSM-compatible schema.
+
+The convert_* functions are lazy generators over GeoJSON-like feature dicts:
+
+    from usfs_to_osm import convert_roads, sources
+
+    for feature in convert_roads(sources.read_features("S_USA.RoadCore_FS.gdb")):
+        ...
+
+They also accept batches: if an item is a list (or tuple) of features, a pyarrow
+RecordBatch with a WKB geometry column, or a (geometry_name, RecordBatch) pair as
+yielded by sources.read_batches, a list of the converted features in that batch is
+yielded for it instead. Features that the converter drops are left out. The input
+features aren't modified.
+
+The roads-to-osm.py, trails-to-osm.py and recsites-to-osm.py scripts are command-line
+wrappers around these.
+"""
+
+
+def convert(feature_to_osm, features):
+    """Runs feature_to_osm over features (or batches of features), as described above"""
+    from .sources import batch_to_features, geometry_column
+
+    for item in features:
+        if isinstance(item, dict):
+            result = feature_to_osm({**item})
+            if result:
+                yield result
+            continue
+
+        if isinstance(item, tuple) and len(item) == 2 and isinstance(item[0], str):
+            item = batch_to_features(*item)
+        elif hasattr(item, "schema"):
+            item = batch_to_features(geometry_column(item.schema), item)
+
+        batch = []
+        for feature in item:
+            result = feature_to_osm({**feature})
+            if result:
+                batch.append(result)
+        yield batch
+
+
+def convert_roads(features):
+    """Converts National Forest System Roads ('S_USA.RoadCore') features"""
+    from .roads import feature_to_osm
+
+    return convert(feature_to_osm, features)
+
+
+def convert_trails(features):
+    """Converts National Forest System Trails ('S_USA.TrailNFS') features"""
+    from .trails import feature_to_osm
+
+    return convert(feature_to_osm, features)
+
+
+def convert_recsites(features):
+    """Converts Recreation Opportunities features"""
+    from .recsites import feature_to_osm
+
+    return convert(feature_to_osm, features)
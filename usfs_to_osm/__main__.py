@@ -0,0 +1,3 @@
+from .cli import command_main
+
+command_main()
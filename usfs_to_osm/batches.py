@@ -0,0 +1,72 @@
+"""
+The columnar conversion engine: converting whole record batches at once.
+
+A columnar converter (such as roads.columns_to_osm) takes a pyarrow Table or
+RecordBatch of attributes and returns a list of tag dicts, one per row. Batches read
+from a GDAL dataset are passed to it as they are; features from other sources are
+gathered into batches and their properties turned into columns first.
+"""
+
+from . import geometry, merge, parallel
+
+
+def _column(pa, values):
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # a mix of types (e.g. mileposts as both numbers and strings); the converters
+        # read columns as strings anyway
+        return pa.array([None if value is None else str(value) for value in values], pa.string())
+
+
+def features_to_table(features):
+    """Makes a pyarrow Table of the properties of a list of features"""
+    import pyarrow as pa
+
+    properties = [feature["properties"] for feature in features]
+    names = dict.fromkeys(name for props in properties for name in props)
+    return pa.table({name: _column(pa, [props.get(name) for props in properties]) for name in names})
+
+
+def _results(features, tags, properties, finish, segment_id):
+    if segment_id is not None:
+        keys = properties.column(segment_id).to_pylist()
+        mileposts = (
+            [merge.milepost(value) for value in properties.column("BMP").to_pylist()]
+            if "BMP" in properties.column_names
+            else [None] * len(keys)
+        )
+    for i, (feature, feature_tags) in enumerate(zip(features, tags)):
+        feature["properties"] = feature_tags
+        if finish is not None:
+            feature = finish(feature)
+        # like merge.convert_segment
+        yield (keys[i], mileposts[i], feature) if segment_id is not None else feature
+
+
+def convert_features(columns_to_osm, features, batch_size, finish=None, segment_id=None):
+    """
+    Converts features in batches of batch_size with columns_to_osm, yielding the
+    converted features. If given, finish is applied to each converted feature. If
+    segment_id is given, (id, milepost, feature) tuples are yielded instead, as from
+    merge.convert_segment.
+    """
+    for chunk in parallel.chunked(features, batch_size):
+        properties = features_to_table(chunk)
+        yield from _results(chunk, columns_to_osm(properties), properties, finish, segment_id)
+
+
+def convert_batches(columns_to_osm, batches, finish=None, segment_id=None):
+    """
+    Converts (geometry_column, RecordBatch) pairs from sources.read_batches with
+    columns_to_osm, yielding features as for convert_features
+    """
+    for geometry_name, batch in batches:
+        tags = columns_to_osm(batch)
+        # geometries are decoded as they're needed; holding a whole batch of decoded
+        # geometries at once makes the garbage collector a lot busier
+        features = (
+            {"type": "Feature", "properties": None, "geometry": geometry.from_wkb(wkb)}
+            for wkb in batch.column(geometry_name).to_pylist()
+        )
+        yield from _results(features, tags, batch, finish, segment_id)
@@ -0,0 +1,583 @@
+"""
+Command-line handling for the roads, trails and recsites converters, and for the
+usfs-to-osm command that runs any or all of them.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import functools
+import importlib
+import os
+import sys
+import time
+
+from . import (
+    batches,
+    clip,
+    codec,
+    compact,
+    merge,
+    parallel,
+    rawfeature,
+    regions,
+    schema,
+    simplify,
+    sinks,
+    sources,
+    split,
+    stats,
+)
+
+
+def add_input_arguments(parser, single=True):
+    if single:
+        parser.add_argument(
+            "input",
+            nargs="?",
+            default="-",
+            help="input dataset: a .gdb, a GeoJSON file, or newline-delimited GeoJSON "
+            "(default: read newline-delimited GeoJSON from STDIN)",
+        )
+        parser.add_argument(
+            "--layer",
+            help="layer to read from a multi-layer dataset (default: the first layer)",
+        )
+    parser.add_argument(
+        "--bbox",
+        nargs=4,
+        type=float,
+        metavar=("XMIN", "YMIN", "XMAX", "YMAX"),
+        help="only convert features whose envelope intersects this extent "
+        "(like ogr2ogr -spat)",
+    )
+    parser.add_argument(
+        "--clip",
+        metavar="PATH",
+        help="only convert features that intersect the polygons in PATH (e.g. a state "
+        "or forest boundary)",
+    )
+    parser.add_argument(
+        "--clip-lines",
+        action="store_true",
+        help="with --clip, also cut lines that cross the boundary at the boundary",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=sources.DEFAULT_BATCH_SIZE,
+        help="number of features per record batch when reading a GDAL dataset",
+    )
+
+
+def add_output_arguments(parser, single=True, merge=False):
+    if merge or not single:
+        parser.add_argument(
+            "--merge",
+            action="store_true",
+            help="merge contiguous segments of the same road with identical tags into "
+            "single ways (holds the whole dataset in memory)",
+        )
+    parser.add_argument(
+        "--simplify",
+        type=float,
+        metavar="METERS",
+        help="simplify lines, dropping vertices that are less than METERS from the "
+        "simplified line (endpoints, and vertices where other lines end, are kept; "
+        "holds the whole dataset in memory)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(sinks.WRITERS),
+        default="ndjson",
+        help="output format (default: newline-delimited GeoJSON)",
+    )
+    if single:
+        parser.add_argument(
+            "-o",
+            "--output",
+            metavar="PATH",
+            help="write output to PATH instead of STDOUT (with --regions, PATH must "
+            "contain {region}, which is replaced with each region's name)",
+        )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="round coordinates (see --precision), drop Z values and repeated vertices, "
+        "and leave out null tags",
+    )
+    parser.add_argument(
+        "--precision",
+        type=int,
+        default=compact.DEFAULT_PRECISION,
+        metavar="DIGITS",
+        help="with --compact, the number of decimal places to round coordinates to "
+        f"(default: {compact.DEFAULT_PRECISION}, about 1 cm)",
+    )
+    parser.add_argument(
+        "--max-nodes",
+        type=int,
+        metavar="N",
+        help="split lines with more than N vertices into several ways that share their "
+        "end nodes (default: 2000 for osm and pbf output, otherwise 0, which disables "
+        "splitting)",
+    )
+    parser.add_argument(
+        "--regions",
+        metavar="PATH",
+        help="write a separate output for each region in PATH (a GeoJSON file of "
+        "polygons with a name property, or a text file of NAME XMIN YMIN XMAX YMAX "
+        "lines), from a single pass over the input",
+    )
+
+
+def add_run_arguments(parser, single=True):
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="convert features on a pool of N worker processes (default: 1, which "
+        "converts in this process)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=parallel.DEFAULT_CHUNK_SIZE,
+        help="number of features sent to a worker at a time (with --workers)",
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="with --workers, write results as soon as they're ready instead of in "
+        "input order",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=sorted(codec.BACKENDS),
+        default=codec.DEFAULT_BACKEND,
+        help=f"JSON library to use (default: {codec.DEFAULT_BACKEND})",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="report details of the run (such as the JSON backend in use, and cache "
+        "statistics at the end) on STDERR",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("feature", "columnar"),
+        default="feature",
+        help="convert features one at a time, or whole record batches at a time with "
+        "Arrow compute functions, for datasets that support it (default: feature; the "
+        "columnar engine always runs in this process)",
+    )
+    if single:
+        parser.add_argument(
+            "--dump-input",
+            metavar="PATH",
+            help="also write the input features (before conversion) to PATH as "
+            "newline-delimited GeoJSON, for debugging",
+        )
+
+
+def add_arguments(parser, module):
+    """Adds the arguments for converting a single dataset with module to parser"""
+    add_input_arguments(parser)
+    add_output_arguments(parser, merge=hasattr(module, "SEGMENT_ID"))
+    add_run_arguments(parser)
+
+
+def check_args(parser, args):
+    if args.regions and (not args.output or "{region}" not in args.output):
+        parser.error("--regions needs an output path containing {region} (-o PATH)")
+    if getattr(sinks.WRITERS[args.format], "needs_path", False) and not args.output:
+        parser.error(f"--format {args.format} needs an output file (-o PATH)")
+    check_max_nodes(parser, args)
+
+
+def check_max_nodes(parser, args):
+    if args.max_nodes is not None and args.max_nodes != 0 and args.max_nodes < 2:
+        parser.error("--max-nodes must be 0 (no splitting) or at least 2")
+
+
+def parse_args(module, description, argv=None):
+    parser = argparse.ArgumentParser(
+        description=description,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    add_arguments(parser, module)
+    args = parser.parse_args(argv)
+    check_args(parser, args)
+    return args
+
+
+def dump_features(features, path):
+    """
+    Passes features (or raw newline-delimited GeoJSON lines) through unchanged while
+    writing a copy of each one to path
+    """
+    with open(path, "wb") as f:
+        for feature in features:
+            if isinstance(feature, bytes):
+                f.write(feature)
+            else:
+                f.write(codec.dumps(feature))
+                f.write(b"\n")
+            yield feature
+
+
+def convert(feature_to_osm, features):
+    """Converts features one at a time in this process, skipping any that are dropped"""
+    for feature in features:
+        try:
+            result = feature_to_osm(feature)
+        except Exception as e:
+            print(feature["properties"], file=sys.stderr)
+            raise e
+
+        if result:
+            yield result
+
+
+def run(module, args, pool=None):
+    """
+    Converts the input given by args with a converter module (such as roads) and writes
+    the output, returning the number of features written. If pool is given (see
+    parallel.make_pool), it's used instead of starting a new pool for --workers.
+
+    The module must have a feature_to_osm function, and may have:
+    - specialize(columns, fixed), which returns a feature_to_osm function for an input
+      with the given columns (which every feature has, if fixed is True), or raises
+      schema.SchemaError if it can't be converted
+    - columns_to_osm(table), a columnar converter for --engine columnar (see batches)
+    - SEGMENT_ID, the column that identifies the way a feature is a segment of, for
+      --merge
+    - accepts_line(line), which returns False for raw newline-delimited GeoJSON lines
+      that would be dropped anyway, so they can be skipped without decoding them
+    - WHERE, an SQL WHERE clause selecting the features that wouldn't be dropped, which
+      GDAL applies as it reads other formats
+    """
+    writer_class = sinks.WRITERS[args.format]
+    dump_input = getattr(args, "dump_input", None)
+    segment_id = getattr(module, "SEGMENT_ID", None)
+    columns_to_osm = getattr(module, "columns_to_osm", None)
+    accepts_line = getattr(module, "accepts_line", None)
+    where = getattr(module, "WHERE", None)
+    merging = getattr(args, "merge", False) and segment_id is not None
+    simplifying = bool(getattr(args, "simplify", None))
+    max_nodes = args.max_nodes
+    if max_nodes is None:
+        max_nodes = getattr(writer_class, "max_way_nodes", 0)
+    columnar = args.engine == "columnar" and columns_to_osm is not None
+    workers = 1 if columnar else args.workers
+    index = regions.RegionIndex(regions.load_regions(args.regions)) if args.regions else None
+
+    clipper = None
+    if args.clip:
+        clipper = clip.Clipper.from_file(args.clip, clip_lines=args.clip_lines)
+
+    # Raw lines can be converted without decoding their geometry, as long as we don't
+    # need the geometry (for a bbox test, clipping, compacting, merging, simplifying,
+    # splitting or routing to regions) and the output is JSON text anyway
+    raw = (
+        sources.is_ndjson(args.input)
+        and not columnar
+        and args.bbox is None
+        and not args.compact
+        and clipper is None
+        and not merging
+        and not simplifying
+        and not max_nodes
+        and index is None
+        and writer_class.encoded
+    )
+
+    # GDAL's record batches can go straight to a columnar converter, unless something
+    # needs the features first
+    whole_batches = (
+        columnar and not sources.is_ndjson(args.input) and clipper is None and not dump_input
+    )
+
+    bbox = args.bbox
+    if bbox is None and not sources.is_ndjson(args.input):
+        # let GDAL skip anything outside the clip boundary or all the regions
+        if clipper is not None:
+            bbox = clipper.bbox
+        elif index is not None:
+            bbox = regions.union_bbox(index.regions)
+
+    if raw or (workers > 1 and sources.is_ndjson(args.input) and clipper is None):
+        # leave decoding the lines to rawfeature or the workers
+        features = sources.read_lines(args.input, accepts_line)
+    elif whole_batches:
+        features = sources.read_batches(args.input, args.layer, bbox, args.batch_size, where)
+    else:
+        features = sources.read_features(
+            args.input, args.layer, bbox, args.batch_size, accepts_line, where
+        )
+        if clipper is not None:
+            features = clipper.filter(features)
+
+    # check the input's columns, and build a converter for them
+    columns, features = schema.peek_columns(features)
+    feature_to_osm = module.feature_to_osm
+    if columns is not None and hasattr(module, "specialize"):
+        # every feature read through GDAL has the same columns; ndjson features needn't
+        feature_to_osm = module.specialize(columns, not sources.is_ndjson(args.input))
+
+    if dump_input:
+        features = dump_features(features, dump_input)
+
+    converter = feature_to_osm
+    if args.compact:
+        converter = functools.partial(compact.convert_compact, converter, args.precision)
+    if merging:
+        # keep each segment's ID and milepost with the result, for merge_segments
+        converter = functools.partial(merge.convert_segment, converter, segment_id)
+
+    # Results from the workers are already encoded, if nothing else needs them
+    encoded = raw or (
+        workers > 1
+        and writer_class.encoded
+        and index is None
+        and not merging
+        and not simplifying
+        and not max_nodes
+    )
+
+    if columnar:
+        finish = None
+        if args.compact:
+            finish = functools.partial(compact.compact_feature, precision=args.precision)
+        segment_key = segment_id if merging else None
+        if whole_batches:
+            results = batches.convert_batches(columns_to_osm, features, finish, segment_key)
+        else:
+            results = batches.convert_features(
+                columns_to_osm, features, args.batch_size, finish, segment_key
+            )
+    elif workers > 1:
+        results = parallel.convert_parallel(
+            converter,
+            features,
+            workers,
+            chunk_size=args.chunk_size,
+            ordered=not args.unordered,
+            bbox=args.bbox,
+            encode=encoded,
+            raw=raw,
+            pool=pool,
+        )
+    elif raw:
+        results = rawfeature.convert_lines(converter, features)
+    else:
+        results = convert(converter, features)
+
+    if merging:
+        results = merge.merge_segments(results)
+
+    if simplifying:
+        dataset = getattr(args, "dataset", None)
+        label = f"{dataset} simplify" if dataset else "simplify"
+        results = simplify.simplify_features(results, args.simplify, label)
+
+    if max_nodes:
+        results = split.split_features(results, max_nodes)
+
+    if index is not None:
+        return write_regions(results, args, index)
+
+    count = 0
+    with sinks.open_writer(args.format, args.output) as writer:
+        write = writer.write_encoded if encoded else writer.write
+        for result in results:
+            write(result)
+            count += 1
+
+    return count
+
+
+def write_regions(results, args, index):
+    """
+    Writes each result to the output of every region it intersects, returning the
+    number of features written (counting each feature once)
+    """
+    encoded = sinks.WRITERS[args.format].encoded
+    count = 0
+
+    with contextlib.ExitStack() as stack:
+        writers = {}
+        for region in index.regions:
+            path = args.output.format(region=regions.safe_name(region.name))
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            writers[region] = stack.enter_context(sinks.open_writer(args.format, path))
+
+        for result in results:
+            targets = index.route(result)
+            if not targets:
+                continue
+            # encode once, however many regions the feature is written to
+            data = codec.dumps(result) if encoded else None
+            for region in targets:
+                if encoded:
+                    writers[region].write_encoded(data)
+                else:
+                    writers[region].write(result)
+                stats.count(f"features in region {region.name}")
+            count += 1
+
+    return count
+
+
+def start(args):
+    codec.select(args.json_backend)
+    if args.verbose:
+        print(f"JSON backend: {codec.describe()}", file=sys.stderr)
+
+
+def main(module, description, argv=None):
+    """Converts the features given on the command line with a converter module (see run)"""
+    args = parse_args(module, description, argv)
+    start(args)
+    try:
+        run(module, args)
+    except schema.SchemaError as e:
+        sys.exit(f"{os.path.basename(sys.argv[0])}: error: {e}")
+    if args.verbose:
+        stats.report()
+
+
+# The datasets the usfs-to-osm command knows about: the module that converts each one,
+# the base name of its output files in `usfs-to-osm all`, and a description
+DATASETS = {
+    "roads": (
+        "usfs_to_osm.roads",
+        "RoadCore",
+        "convert National Forest System Roads ('S_USA.RoadCore')",
+    ),
+    "trails": (
+        "usfs_to_osm.trails",
+        "TrailNFS",
+        "convert National Forest System Trails ('S_USA.TrailNFS_Publish')",
+    ),
+    "recsites": (
+        "usfs_to_osm.recsites",
+        "RecOpportunities",
+        "convert Recreation Opportunities (trailheads, campgrounds, ...)",
+    ),
+}
+
+
+def dataset_module(dataset):
+    return importlib.import_module(DATASETS[dataset][0])
+
+
+def run_all(args):
+    """
+    Converts every dataset given on the command line at once. Each conversion runs on
+    its own thread, so reading and writing one dataset overlaps with converting the
+    others, and with --workers they all share one pool of worker processes.
+    """
+    jobs = []
+    for dataset, (_, basename, _) in DATASETS.items():
+        path = getattr(args, dataset)
+        if not path:
+            continue
+        job_args = argparse.Namespace(**vars(args))
+        job_args.input = path
+        job_args.layer = None
+        job_args.dataset = dataset
+        filename = basename + sinks.EXTENSIONS[args.format]
+        if args.regions:
+            job_args.output = os.path.join(args.output_dir, "{region}", filename)
+        else:
+            job_args.output = os.path.join(args.output_dir, filename)
+        jobs.append((dataset, job_args))
+
+    def timed(dataset, job_args, pool):
+        started = time.perf_counter()
+        count = run(dataset_module(dataset), job_args, pool)
+        return count, time.perf_counter() - started
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    pool = parallel.make_pool(args.workers) if args.workers > 1 else None
+    try:
+        with concurrent.futures.ThreadPoolExecutor(len(jobs)) as threads:
+            futures = [
+                (dataset, job_args, threads.submit(timed, dataset, job_args, pool))
+                for dataset, job_args in jobs
+            ]
+            timings = [
+                (dataset, job_args, future.result()) for dataset, job_args, future in futures
+            ]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    for dataset, job_args, (count, seconds) in timings:
+        rate = count / seconds if seconds else 0
+        print(
+            f"{dataset}: {count} features in {seconds:.1f}s ({rate:,.0f}/s) -> {job_args.output}",
+            file=sys.stderr,
+        )
+
+
+def command_main(argv=None):
+    """Entry point for the usfs-to-osm command"""
+    parser = argparse.ArgumentParser(
+        prog="usfs-to-osm",
+        description="Converts USFS roads, trails and recreation sites data to an "
+        "OSM-compatible schema.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for dataset, (_, _, description) in DATASETS.items():
+        subparser = subparsers.add_parser(
+            dataset,
+            help=description,
+            description=description[0].upper() + description[1:] + ".",
+        )
+        add_arguments(subparser, dataset_module(dataset))
+
+    all_parser = subparsers.add_parser(
+        "all",
+        help="convert several datasets at once",
+        description="Converts several datasets at once, writing each one to its own "
+        "file in --output-dir and printing how long each took.",
+    )
+    for dataset in DATASETS:
+        all_parser.add_argument(f"--{dataset}", metavar="PATH", help=f"input {dataset} dataset")
+    all_parser.add_argument(
+        "--output-dir",
+        default=".",
+        metavar="DIR",
+        help="directory to write the output files to (default: the current directory)",
+    )
+    add_input_arguments(all_parser, single=False)
+    add_output_arguments(all_parser, single=False)
+    add_run_arguments(all_parser, single=False)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "all":
+        if not any(getattr(args, dataset) for dataset in DATASETS):
+            all_parser.error("no input datasets given")
+        check_max_nodes(all_parser, args)
+    else:
+        check_args(parser, args)
+        args.dataset = args.command
+    start(args)
+
+    try:
+        if args.command == "all":
+            run_all(args)
+        else:
+            run(dataset_module(args.command), args)
+    except schema.SchemaError as e:
+        sys.exit(f"usfs-to-osm: error: {e}")
+
+    if args.verbose:
+        stats.report()
@@ -0,0 +1,126 @@
+"""
+Filtering (and optionally clipping) features to a boundary polygon, such as a state or
+national forest boundary, which ogr2ogr's rectangular -spat extent can't do.
+
+Features are processed in batches. Each batch is first filtered with a cheap envelope
+test against the boundary's bbox, and the remaining geometries are converted to GEOS
+geometries and tested against the prepared boundary with vectorized shapely calls, so
+the per-feature work done in Python is small. With clipping enabled, lines that cross
+the boundary are cut at it; features that lie entirely inside it are left untouched.
+"""
+
+import json
+
+from . import codec, geometry, parallel, sources, stats
+
+DEFAULT_BATCH_SIZE = 4096
+
+# shapely.get_type_id values
+POINT, LINESTRING, MULTILINESTRING, GEOMETRYCOLLECTION = 0, 1, 5, 7
+
+
+def load_boundary(path):
+    """
+    Reads the polygons in path (GeoJSON, or any dataset GDAL can read) and returns their
+    union as a shapely geometry
+    """
+    shapely = geometry.import_shapely()
+
+    if path.lower().endswith((".json", ".geojson")):
+        with open(path) as f:
+            data = json.load(f)
+        if data["type"] == "FeatureCollection":
+            geometries = [feature["geometry"] for feature in data["features"]]
+        elif data["type"] == "Feature":
+            geometries = [data["geometry"]]
+        else:
+            geometries = [data]
+    else:
+        geometries = [feature["geometry"] for feature in sources.read_features(path)]
+
+    shapes = [shapely.geometry.shape(g) for g in geometries if g is not None]
+    if not shapes:
+        raise ValueError(f"{path} doesn't contain any polygons")
+    return shapely.union_all(shapes)
+
+
+class Clipper:
+    def __init__(self, boundary, clip_lines=False, batch_size=DEFAULT_BATCH_SIZE):
+        self.shapely = geometry.import_shapely()
+        self.boundary = boundary
+        self.shapely.prepare(boundary)
+        self.bbox = boundary.bounds
+        self.clip_lines = clip_lines
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        return cls(load_boundary(path), **kwargs)
+
+    def filter(self, features):
+        """Yields the features that intersect the boundary (clipped, if enabled)"""
+        for batch in parallel.chunked(features, self.batch_size):
+            yield from self.filter_batch(batch)
+
+    def filter_batch(self, batch):
+        import numpy as np
+
+        shapely = self.shapely
+
+        candidates = [
+            feature
+            for feature in batch
+            if geometry.intersects_bbox(feature.get("geometry"), self.bbox)
+        ]
+        stats.count("clip: features outside boundary bbox", len(batch) - len(candidates))
+        if not candidates:
+            return []
+
+        shapes = shapely.from_geojson(
+            np.array([codec.dumps(f["geometry"]) for f in candidates], dtype=object)
+        )
+        inside = shapely.intersects(self.boundary, shapes)
+        stats.count("clip: features outside boundary", int((~inside).sum()))
+
+        if not self.clip_lines:
+            return [feature for feature, keep in zip(candidates, inside) if keep]
+
+        # Anything not entirely inside the boundary crosses it, and gets clipped
+        crossing = inside & ~shapely.contains_properly(self.boundary, shapes)
+        stats.count("clip: features clipped", int(crossing.sum()))
+        clipped = shapely.intersection(shapes[crossing], self.boundary)
+        lines = np.isin(shapely.get_type_id(shapes[crossing]), (LINESTRING, MULTILINESTRING))
+        clipped[lines] = [self.linear_parts(shape) for shape in clipped[lines]]
+        clipped = iter(shapely.to_geojson(clipped))
+
+        results = []
+        for feature, keep, cross in zip(candidates, inside, crossing):
+            if not keep:
+                continue
+            if cross:
+                clipped_geometry = next(clipped)
+                if clipped_geometry is None:
+                    continue
+                clipped_geometry = codec.loads(clipped_geometry)
+                if not list(geometry.iter_positions(clipped_geometry)):
+                    continue
+                feature = {**feature, "geometry": clipped_geometry}
+            results.append(feature)
+        return results
+
+    def linear_parts(self, shape):
+        """
+        Returns the lines of a clipped line (where it also just touched the boundary,
+        that can be a GeometryCollection including points) as a LineString or
+        MultiLineString, or None if there aren't any
+        """
+        shapely = self.shapely
+        if shapely.get_type_id(shape) in (LINESTRING, MULTILINESTRING):
+            return shape
+        parts = shapely.get_parts(shapely.get_parts(shape))
+        parts = parts[shapely.get_type_id(parts) == LINESTRING]
+        if len(parts) == 0:
+            return None
+        if len(parts) == 1:
+            return parts[0]
+        return shapely.multilinestrings(parts)
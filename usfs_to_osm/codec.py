@@ -0,0 +1,61 @@
+"""
+Pluggable JSON encoding and decoding.
+
+Everything works in bytes: loads() accepts bytes (or str) and dumps() returns UTF-8
+bytes. The fastest available backend is used by default; orjson if it's installed,
+otherwise the standard library json module. Call select() to pick one explicitly.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _stdlib_loads(data):
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj):
+    # without the default ", " and ": " separators, like orjson; values it can't
+    # serialize (e.g. the datetimes GDAL reads date columns as) are passed through str()
+    return json.dumps(obj, separators=(",", ":"), default=str).encode()
+
+
+def _orjson_dumps(obj):
+    # orjson's non-str types (e.g. datetime) are already handled natively; anything
+    # else it can't serialize is passed through str(), like _stdlib_dumps
+    return orjson.dumps(obj, default=str)
+
+
+BACKENDS = {"stdlib": (_stdlib_loads, _stdlib_dumps)}
+if orjson is not None:
+    BACKENDS["orjson"] = (orjson.loads, _orjson_dumps)
+
+DEFAULT_BACKEND = "orjson" if orjson is not None else "stdlib"
+
+backend = None
+loads = None
+dumps = None
+
+
+def select(name=None):
+    """Switches the module-level loads/dumps to the named backend (or the default)"""
+    global backend, loads, dumps
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"JSON backend {name!r} is not available")
+    backend = name
+    loads, dumps = BACKENDS[name]
+
+
+def describe():
+    """Returns a description of the active backend, e.g. for --verbose output"""
+    if backend == "orjson":
+        return f"orjson {orjson.__version__}"
+    return f"stdlib json {json.__version__}"
+
+
+select()
@@ -0,0 +1,224 @@
+"""
+Columnar output (GeoParquet and FlatGeobuf), for loading converted data into pandas,
+GeoPandas or QGIS without parsing GeoJSON.
+
+Features are collected into Arrow record batches of a fixed number of rows, and each
+batch is written (as a Parquet row group, or passed on to GDAL's FlatGeobuf driver) as
+soon as it's full, so memory use is bounded by the batch size. Every tag gets its own
+column. The columns and their types are inferred from the first batch; tags that
+first show up after that (or whose values don't fit the column's type) are collected
+into an "other_tags" column as a JSON object, like GDAL's OSM driver does.
+
+These writers need pyarrow, and FlatGeobuf output also needs pyogrio.
+"""
+
+import json
+import queue
+import threading
+
+from . import geometry
+
+DEFAULT_BATCH_SIZE = 65536
+
+GEOMETRY_COLUMN = "geometry"
+OTHER_TAGS_COLUMN = "other_tags"
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise RuntimeError("columnar output requires the pyarrow package") from e
+    return pyarrow
+
+
+def infer_type(pa, values):
+    """Picks an Arrow type for a tag column from the Python values seen for it"""
+    types = {type(value) for value in values if value is not None}
+    if types == {bool}:
+        return pa.bool_()
+    elif types == {int}:
+        return pa.int64()
+    elif types and types <= {int, float}:
+        return pa.float64()
+    return pa.string()
+
+
+PYTHON_TYPES = {
+    "bool": (bool,),
+    "int64": (int,),
+    "double": (int, float),
+}
+
+
+class ColumnarWriter:
+    """
+    Base class for the columnar writers. Subclasses implement open_output(schema),
+    write_batch(batch) and close_output().
+    """
+
+    encoded = False
+
+    # These writers can't write to a pipe, so they're given a path rather than a stream
+    needs_path = True
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        self.pa = import_pyarrow()
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = []
+        self.schema = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.rows or self.schema is None:
+            self.flush()
+        self.close_output()
+
+    def write(self, feature):
+        self.rows.append(feature)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.schema is None:
+            self.schema = self.infer_schema(self.rows)
+            self.open_output(self.schema)
+        self.write_batch(self.to_batch(self.rows))
+        self.rows = []
+
+    def infer_schema(self, rows):
+        pa = self.pa
+        values = {}
+        for row in rows:
+            for key, value in row["properties"].items():
+                values.setdefault(key, []).append(value)
+
+        fields = [pa.field(key, infer_type(pa, column)) for key, column in values.items()]
+        fields.append(pa.field(OTHER_TAGS_COLUMN, pa.string()))
+        fields.append(
+            pa.field(
+                GEOMETRY_COLUMN,
+                pa.binary(),
+                metadata={"ARROW:extension:name": "geoarrow.wkb"},
+            )
+        )
+        return pa.schema(fields)
+
+    def to_batch(self, rows):
+        pa = self.pa
+        tag_fields = [
+            field
+            for field in self.schema
+            if field.name not in (OTHER_TAGS_COLUMN, GEOMETRY_COLUMN)
+        ]
+        columns = {field.name: [] for field in tag_fields}
+        other_tags = []
+        geometries = []
+
+        for row in rows:
+            properties = row["properties"]
+            others = {}
+            for field in tag_fields:
+                value = properties.get(field.name)
+                accepted = PYTHON_TYPES.get(str(field.type))
+                if value is not None and accepted and not isinstance(value, accepted):
+                    others[field.name] = value
+                    value = None
+                elif value is not None and not accepted:
+                    value = str(value)
+                columns[field.name].append(value)
+            for key, value in properties.items():
+                if key not in columns and value is not None:
+                    others[key] = value
+            other_tags.append(json.dumps(others, default=str) if others else None)
+            geometries.append(geometry.to_wkb(row.get("geometry")))
+
+        arrays = [pa.array(columns[field.name], field.type) for field in tag_fields]
+        arrays.append(pa.array(other_tags, pa.string()))
+        arrays.append(pa.array(geometries, pa.binary()))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+class GeoParquetWriter(ColumnarWriter):
+    """Writes features as GeoParquet, one row group per batch"""
+
+    def open_output(self, schema):
+        import pyarrow.parquet
+
+        geo = {
+            "version": "1.0.0",
+            "primary_column": GEOMETRY_COLUMN,
+            "columns": {GEOMETRY_COLUMN: {"encoding": "WKB", "geometry_types": []}},
+        }
+        schema = schema.with_metadata({"geo": json.dumps(geo)})
+        self.schema = schema
+        self.writer = pyarrow.parquet.ParquetWriter(self.path, schema, compression="zstd")
+
+    def write_batch(self, batch):
+        self.writer.write_batch(batch)
+
+    def close_output(self):
+        self.writer.close()
+
+
+class FlatGeobufWriter(ColumnarWriter):
+    """
+    Writes features as FlatGeobuf with a spatial index, using GDAL's driver. GDAL
+    pulls batches from an Arrow stream, so it runs on a background thread that we
+    feed through a small queue.
+    """
+
+    def open_output(self, schema):
+        try:
+            import pyogrio
+        except ImportError as e:
+            raise RuntimeError("FlatGeobuf output requires the pyogrio package") from e
+
+        self.queue = queue.Queue(maxsize=2)
+        self.error = None
+        reader = self.pa.RecordBatchReader.from_batches(schema, iter(self.queue.get, None))
+
+        def run():
+            try:
+                pyogrio.write_arrow(
+                    reader,
+                    self.path,
+                    driver="FlatGeobuf",
+                    geometry_name=GEOMETRY_COLUMN,
+                    geometry_type="Unknown",
+                    crs="EPSG:4326",
+                    layer_options={"SPATIAL_INDEX": "YES"},
+                )
+            except BaseException as e:
+                self.error = e
+                # unblock the producer, which may be waiting for space in the queue
+                while True:
+                    try:
+                        self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def write_batch(self, batch):
+        while self.thread.is_alive():
+            try:
+                self.queue.put(batch, timeout=1)
+                return
+            except queue.Full:
+                continue
+        self.raise_error()
+
+    def close_output(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+        self.thread.join()
+        self.raise_error()
+
+    def raise_error(self):
+        if self.error is not None:
+            raise RuntimeError(f"writing {self.path} failed") from self.error
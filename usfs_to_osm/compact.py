@@ -0,0 +1,78 @@
+"""
+Compact output: converted features with their coordinates rounded to a fixed number
+of decimal places and forced to 2D, consecutive duplicate vertices removed, and
+null-valued tags left out.
+
+7 decimal places (about 1 cm) is the precision OSM stores coordinates at, so
+rounding to it loses nothing that would survive an upload. Rounding can make
+neighbouring vertices equal, which is why duplicates are removed afterwards.
+"""
+
+DEFAULT_PRECISION = 7
+
+
+def compact_line(line, precision):
+    """
+    Rounds a line's positions to precision decimal places, dropping Z values and
+    repeated positions. A line that collapses to a single position keeps two copies of
+    it, so that it's still a valid LineString.
+    """
+    import numpy as np
+
+    positions = np.round(np.asarray(line, dtype=float)[:, :2], precision)
+    if len(positions) > 1:
+        changed = (positions[1:] != positions[:-1]).any(axis=1)
+        if not changed.all():
+            if not changed.any():
+                return positions[:2].tolist()
+            positions = positions[np.concatenate(([True], changed))]
+    return positions.tolist()
+
+
+def compact_position(position, precision):
+    return [round(position[0], precision), round(position[1], precision)]
+
+
+def compact_geometry(geometry, precision):
+    if geometry is None:
+        return None
+
+    kind = geometry["type"]
+    coordinates = geometry.get("coordinates")
+    if kind == "Point":
+        coordinates = compact_position(coordinates, precision)
+    elif kind == "MultiPoint":
+        coordinates = [compact_position(p, precision) for p in coordinates]
+    elif kind == "LineString":
+        coordinates = compact_line(coordinates, precision)
+    elif kind in ("MultiLineString", "Polygon"):
+        coordinates = [compact_line(line, precision) for line in coordinates]
+    elif kind == "MultiPolygon":
+        coordinates = [
+            [compact_line(ring, precision) for ring in polygon] for polygon in coordinates
+        ]
+    elif kind == "GeometryCollection":
+        return {
+            "type": kind,
+            "geometries": [compact_geometry(g, precision) for g in geometry["geometries"]],
+        }
+    return {"type": kind, "coordinates": coordinates}
+
+
+def compact_feature(feature, precision=DEFAULT_PRECISION):
+    """Returns a compacted copy of a converted feature"""
+    return {
+        **feature,
+        "properties": {k: v for k, v in feature["properties"].items() if v is not None},
+        "geometry": compact_geometry(feature.get("geometry"), precision),
+    }
+
+
+def convert_compact(feature_to_osm, precision, feature):
+    """
+    Converts feature with feature_to_osm and compacts the result. This is a converter
+    itself (with functools.partial), so compacting happens wherever conversion does,
+    including on worker processes.
+    """
+    result = feature_to_osm(feature)
+    return compact_feature(result, precision) if result else result
@@ -0,0 +1,207 @@
+"""
+Small helpers for working with GeoJSON geometries.
+"""
+
+import struct
+
+WKB_POINT = 1
+WKB_LINESTRING = 2
+WKB_POLYGON = 3
+WKB_MULTIPOINT = 4
+WKB_MULTILINESTRING = 5
+WKB_MULTIPOLYGON = 6
+WKB_GEOMETRYCOLLECTION = 7
+
+WKB_TYPE_NAMES = {
+    WKB_POINT: "Point",
+    WKB_LINESTRING: "LineString",
+    WKB_POLYGON: "Polygon",
+    WKB_MULTIPOINT: "MultiPoint",
+    WKB_MULTILINESTRING: "MultiLineString",
+    WKB_MULTIPOLYGON: "MultiPolygon",
+    WKB_GEOMETRYCOLLECTION: "GeometryCollection",
+}
+
+WKB_TYPE_CODES = {name: code for code, name in WKB_TYPE_NAMES.items()}
+
+# EWKB (PostGIS style) dimension and SRID flags
+EWKB_Z = 0x80000000
+EWKB_M = 0x40000000
+EWKB_SRID = 0x20000000
+
+
+def import_shapely():
+    """Imports shapely (2.0 or later), which is needed for polygon operations"""
+    try:
+        import shapely
+        import shapely.geometry
+    except ImportError as e:
+        raise RuntimeError("polygon regions and clipping require the shapely package") from e
+    return shapely
+
+
+def from_wkb(data):
+    """
+    Decodes a WKB (ISO or EWKB) geometry into a GeoJSON geometry dict. Z values are
+    kept and M values are dropped, which matches what ogr2ogr writes to GeoJSON.
+    """
+    if data is None:
+        return None
+    geometry, _ = _read_wkb(memoryview(data), 0)
+    return geometry
+
+
+def _read_wkb(buf, offset):
+    order = "<" if buf[offset] == 1 else ">"
+    (code,) = struct.unpack_from(order + "I", buf, offset + 1)
+    offset += 5
+
+    has_z = bool(code & EWKB_Z)
+    has_m = bool(code & EWKB_M)
+    if code & EWKB_SRID:
+        offset += 4
+    code &= 0x0FFFFFFF
+
+    # ISO WKB encodes dimensions in the thousands digit of the type code
+    if code >= 3000:
+        has_z = has_m = True
+    elif code >= 2000:
+        has_m = True
+    elif code >= 1000:
+        has_z = True
+    code %= 1000
+
+    if code not in WKB_TYPE_NAMES:
+        raise ValueError(f"unsupported WKB geometry type {code}")
+
+    dims = 2 + has_z + has_m
+    keep = 3 if has_z else 2
+    point = struct.Struct(order + "d" * dims)
+    count = struct.Struct(order + "I")
+
+    def read_points(offset):
+        (n,) = count.unpack_from(buf, offset)
+        offset += 4
+        points = [list(p[:keep]) for p in point.iter_unpack(buf[offset : offset + n * point.size])]
+        return points, offset + n * point.size
+
+    def read_rings(offset):
+        (n,) = count.unpack_from(buf, offset)
+        offset += 4
+        rings = []
+        for _ in range(n):
+            ring, offset = read_points(offset)
+            rings.append(ring)
+        return rings, offset
+
+    if code == WKB_POINT:
+        coordinates = list(point.unpack_from(buf, offset)[:keep])
+        offset += point.size
+    elif code == WKB_LINESTRING:
+        coordinates, offset = read_points(offset)
+    elif code == WKB_POLYGON:
+        coordinates, offset = read_rings(offset)
+    else:
+        (n,) = count.unpack_from(buf, offset)
+        offset += 4
+        parts = []
+        for _ in range(n):
+            part, offset = _read_wkb(buf, offset)
+            parts.append(part)
+        if code == WKB_GEOMETRYCOLLECTION:
+            return {"type": "GeometryCollection", "geometries": parts}, offset
+        coordinates = [part["coordinates"] for part in parts]
+
+    return {"type": WKB_TYPE_NAMES[code], "coordinates": coordinates}, offset
+
+
+def to_wkb(geometry):
+    """
+    Encodes a GeoJSON geometry dict as little-endian ISO WKB. Geometries whose first
+    position has a Z value are written as 3D.
+    """
+    if geometry is None:
+        return None
+    first = next(iter_positions(geometry), ())
+    has_z = len(first) > 2
+    out = bytearray()
+    _write_wkb(out, geometry, has_z)
+    return bytes(out)
+
+
+def _write_wkb(out, geometry, has_z):
+    name = geometry["type"]
+    code = WKB_TYPE_CODES[name]
+    out.extend(struct.pack("<BI", 1, code + 1000 if has_z else code))
+
+    dims = 3 if has_z else 2
+    point = struct.Struct("<" + "d" * dims)
+
+    def write_position(p):
+        # positions without a Z value in a 3D geometry get a Z of 0
+        out.extend(point.pack(*p[:dims]) if len(p) >= dims else point.pack(*p, 0.0))
+
+    def write_points(points):
+        out.extend(struct.pack("<I", len(points)))
+        for p in points:
+            write_position(p)
+
+    if name == "Point":
+        write_position(geometry["coordinates"])
+    elif name == "LineString":
+        write_points(geometry["coordinates"])
+    elif name == "Polygon":
+        out.extend(struct.pack("<I", len(geometry["coordinates"])))
+        for ring in geometry["coordinates"]:
+            write_points(ring)
+    elif name == "GeometryCollection":
+        out.extend(struct.pack("<I", len(geometry["geometries"])))
+        for part in geometry["geometries"]:
+            _write_wkb(out, part, has_z)
+    else:
+        part_type = name[len("Multi") :]
+        out.extend(struct.pack("<I", len(geometry["coordinates"])))
+        for coords in geometry["coordinates"]:
+            _write_wkb(out, {"type": part_type, "coordinates": coords}, has_z)
+
+
+def iter_positions(geometry):
+    """Yields every position in a GeoJSON geometry, in order"""
+    if geometry["type"] == "GeometryCollection":
+        for part in geometry["geometries"]:
+            yield from iter_positions(part)
+        return
+
+    stack = [geometry["coordinates"]]
+    while stack:
+        coords = stack.pop()
+        if coords and isinstance(coords[0], (int, float)):
+            yield coords
+        else:
+            stack.extend(reversed(coords))
+
+
+def bounds(geometry):
+    """Returns the (xmin, ymin, xmax, ymax) envelope of a GeoJSON geometry"""
+    xs = []
+    ys = []
+    for position in iter_positions(geometry):
+        xs.append(position[0])
+        ys.append(position[1])
+    if not xs:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def intersects_bbox(geometry, bbox):
+    """
+    Tests whether the envelope of a geometry intersects bbox, which is the same test
+    ogr2ogr applies for its -spat option.
+    """
+    if geometry is None:
+        return False
+    envelope = bounds(geometry)
+    if envelope is None:
+        return False
+    xmin, ymin, xmax, ymax = envelope
+    return not (xmax < bbox[0] or xmin > bbox[2] or ymax < bbox[1] or ymin > bbox[3])
@@ -0,0 +1,142 @@
+"""
+Merging of contiguous segments of the same road into single ways.
+
+RoadCore splits each road into segments at its linear-referencing mileposts (BMP to
+EMP), so a road whose attributes don't change along its length still comes out as
+many short features with identical tags. This stage groups converted segments by the
+road's ID and their tags, then chains segments whose endpoints meet into a single
+LineString, starting from the lowest milepost. GDAL reads the FS geodatabases'
+polylines as single-part MultiLineStrings; those are merged the same way, and stay
+MultiLineStrings. Endpoints are looked up in a hash
+index, so merging is linear in the number of segments.
+
+Segments can be converted anywhere (including on worker processes) with
+convert_segment, which keeps the ID and milepost that merging needs alongside the
+converted feature. Since segments of a road may be spread through the input, all of
+them are held until the input ends.
+"""
+
+from . import stats
+
+
+def milepost(value):
+    """Returns a BMP value as a float (it may be a number or a string), or None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def convert_segment(feature_to_osm, segment_id, feature):
+    """
+    Converts feature with feature_to_osm, returning (id, milepost, result), or None if
+    the feature is dropped
+    """
+    props = feature["properties"]
+    key, bmp = props.get(segment_id), milepost(props.get("BMP"))
+    result = feature_to_osm(feature)
+    if not result:
+        return None
+    return key, bmp, result
+
+
+def merge_segments(segments):
+    """
+    Merges (id, milepost, feature) tuples (see convert_segment) and yields the
+    resulting features, in the order each road first appeared in the input.
+    Features that aren't LineStrings or single-part MultiLineStrings, or have no ID,
+    are passed through unchanged.
+    """
+    groups = {}
+    for key, milepost, feature in segments:
+        stats.count("merge: segments in")
+        line = segment_line(feature.get("geometry"))
+        if key is None or line is None:
+            stats.count("merge: ways out")
+            yield feature
+            continue
+        group = (key, feature["geometry"]["type"], tuple(feature["properties"].items()))
+        groups.setdefault(group, []).append((milepost, feature, line))
+
+    for (_, geometry_type, _), members in groups.items():
+        for feature in merge_group(members, geometry_type):
+            stats.count("merge: ways out")
+            yield feature
+
+
+def segment_line(geometry):
+    """
+    Returns the coordinates of a LineString, or of the only part of a MultiLineString,
+    or None for anything else
+    """
+    if geometry is None:
+        return None
+    if geometry["type"] == "LineString":
+        return geometry["coordinates"]
+    if geometry["type"] == "MultiLineString" and len(geometry["coordinates"]) == 1:
+        return geometry["coordinates"][0]
+    return None
+
+
+def merge_group(members, geometry_type="LineString"):
+    """
+    Chains a group of (milepost, feature, coordinates) segments with the same ID, tags
+    and geometry_type together where their endpoints meet, yielding the merged
+    features (with geometries of the same type)
+    """
+    if len(members) == 1:
+        yield members[0][1]
+        return
+
+    # Lowest milepost first (segments without one go last, in input order)
+    order = sorted(
+        range(len(members)),
+        key=lambda i: (members[i][0] is None, members[i][0] or 0, i),
+    )
+    lines = [[tuple(p) for p in members[i][2]] for i in order]
+    features = [members[i][1] for i in order]
+
+    # Segments by each of their endpoints
+    endpoints = {}
+    for i, line in enumerate(lines):
+        endpoints.setdefault(line[0], []).append(i)
+        if line[-1] != line[0]:
+            endpoints.setdefault(line[-1], []).append(i)
+
+    used = [False] * len(lines)
+
+    def next_segment(point):
+        for i in endpoints.get(point, ()):
+            if not used[i]:
+                used[i] = True
+                line = lines[i]
+                return line if line[0] == point else line[::-1]
+        return None
+
+    for i, line in enumerate(lines):
+        if used[i]:
+            continue
+        used[i] = True
+        chain = list(line)
+        # extend forwards from the end, then backwards from the start (collecting the
+        # preceding segments separately, so as not to keep copying the chain)
+        while chain[0] != chain[-1] and (following := next_segment(chain[-1])):
+            chain.extend(following[1:])
+        start = chain[0]
+        preceding = []
+        while start != chain[-1] and (segment := next_segment(start)):
+            preceding.append(segment[:0:-1])
+            start = segment[-1]
+        if preceding:
+            chain = [p for segment in reversed(preceding) for p in segment] + chain
+
+        feature = features[i]
+        if len(chain) != len(line):
+            coordinates = [list(p) for p in chain]
+            if geometry_type == "MultiLineString":
+                coordinates = [coordinates]
+            feature = {
+                **feature,
+                "geometry": {"type": geometry_type, "coordinates": coordinates},
+            }
+        yield feature
@@ -0,0 +1,158 @@
+"""
+Name normalization shared by the trails and recsites converters.
+
+FS names are mostly upper case and full of abbreviations ("BEAR CK TR"). A
+NameNormalizer turns them into OSM-style names ("Bear Creek Trail") using tables that
+are specific to each dataset. Everything that can be is prepared up front: the
+tokenizer and the other patterns are compiled once, and the replacement for each
+distinct token is computed once and remembered, so normalizing a name is a single
+pass of dictionary lookups over its tokens.
+"""
+
+import functools
+import re
+
+from . import stats
+
+# Regular expressions for "names" that should be considered equivalent to null values,
+# matched at the start of the name
+BAD_NAME_PATTERNS = (
+    r"NFST-\d+",  # trail numbers used as names
+)
+
+# Single character tokens that are copied through unchanged: ( ) * + , - . /
+PUNCTUATION = re.compile(r"[()-/]")
+
+# Tokens that start like a word get capitalized
+WORDLIKE = re.compile(r"[\w']")
+
+# Stop remembering token replacements if there are somehow this many distinct tokens
+MAX_CACHED_TOKENS = 100_000
+
+# Marks tokens that are dropped from names in the token cache
+DROP = object()
+
+
+@functools.lru_cache
+def combine_patterns(patterns):
+    """
+    Compiles a tuple of regular expressions into a single alternation, with each one in
+    a named group (p0, p1, ...) so a match can be traced back to its pattern. The same
+    tuple always gives the same compiled regex, so normalizers share it.
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(patterns)))
+
+
+class NameNormalizer:
+    """
+    Normalizes names using a dataset's tables:
+
+    - abbreviations: expansions for abbreviated words, e.g. {"CK": "Creek"}
+    - special_cases: words with fixed capitalization, e.g. {"OHV": "OHV", "OF": "of"}
+    - bad_words: "filler" words to delete from names
+    - bad_names: names that should be considered equivalent to null values
+    - bad_name_patterns: regular expressions for more bad names
+    - suffix: word added to the end of names that contain none of suffix_words
+    - word_chars: regex character class contents for the characters in a word
+    - skip_token: regex for tokens to delete, e.g. "#\\d+"
+    """
+
+    def __init__(
+        self,
+        abbreviations,
+        special_cases=None,
+        bad_words=(),
+        bad_names=(),
+        bad_name_patterns=(),
+        suffix=None,
+        suffix_words=(),
+        word_chars=r"\w",
+        skip_token=None,
+    ):
+        self.abbreviations = dict(abbreviations)
+        self.special_cases = dict(special_cases or {})
+        self.bad_words = frozenset(bad_words)
+        self.bad_names = frozenset(bad_names)
+        self.bad_name_patterns = tuple(bad_name_patterns)
+        self.bad_name_regex = combine_patterns(self.bad_name_patterns)
+        self.suffix = suffix
+        self.suffix_words = frozenset(suffix_words)
+        self.tokenize = re.compile(rf"\s|[{word_chars}'.]+|[^{word_chars}'.]+").findall
+        self.skip_token = re.compile(skip_token).fullmatch if skip_token else None
+        self.tokens = {}
+
+    def is_bad_name(self, name):
+        """
+        Returns whether name matches one of the bad name patterns, counting it in the
+        stats under the pattern. The converters memoize normalizing names, so this
+        normally runs once per distinct name: it counts distinct names, not features.
+        """
+        if self.bad_name_regex is None:
+            return False
+        match = self.bad_name_regex.match(name)
+        if match is None:
+            return False
+        pattern = self.bad_name_patterns[int(match.lastgroup[1:])]
+        stats.count(f"distinct names matching bad name pattern {pattern}")
+        return True
+
+    def __call__(self, name, id=None):
+        """Returns the normalized form of name, or None if it isn't a real name"""
+        if not name or (id is not None and id in name) or name in self.bad_names:
+            return None
+
+        if self.is_bad_name(name):
+            return None
+
+        name = " ".join(name.replace("/", " / ").split())
+
+        if name.isnumeric():
+            return None
+
+        tokens = self.tokens
+        words = []
+        for token in self.tokenize(name):
+            word = tokens.get(token)
+            if word is None:
+                word = self.replace_token(token)
+                if len(tokens) >= MAX_CACHED_TOKENS:
+                    tokens.clear()
+                tokens[token] = word
+            if word is not DROP:
+                words.append(word)
+
+        if not words:
+            return None
+
+        if self.suffix and not self.suffix_words.intersection(words):
+            words += [" ", self.suffix]
+
+        if words[0].islower():
+            words[0] = words[0].capitalize()
+        if words[-1].islower():
+            words[-1] = words[-1].capitalize()
+
+        return "".join(words)
+
+    def replace_token(self, token):
+        """Returns what a single token becomes in a normalized name (or DROP)"""
+        if token.isspace() or PUNCTUATION.fullmatch(token):
+            return token
+
+        if self.skip_token and self.skip_token(token):
+            return DROP
+
+        word = token.upper()
+        if word in self.bad_words:
+            return DROP
+
+        abbr = self.abbreviations.get(word) or self.abbreviations.get(word.replace(".", ""))
+        if abbr:
+            return abbr
+        elif word in self.special_cases:
+            return self.special_cases[word]
+        elif WORDLIKE.match(word):
+            return word.capitalize()
+        return word
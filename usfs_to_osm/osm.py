@@ -0,0 +1,119 @@
+"""
+Turning GeoJSON features into OSM nodes and ways.
+
+Coordinates are snapped to OSM's precision (1e-7 degrees) and looked up in a hash
+table, so every feature that passes through the same point shares a single node. New
+objects get negative IDs, which is what JOSM and osmium expect for data that hasn't
+been uploaded yet.
+"""
+
+SCALE = 10_000_000
+
+# The OSM API's limit on the number of nodes in a way (see split)
+MAX_WAY_NODES = 2000
+
+
+def to_fixed(degrees):
+    """Converts a coordinate in degrees to OSM's fixed precision integer form"""
+    return round(degrees * SCALE)
+
+
+def format_fixed(value):
+    """Formats a fixed precision coordinate in degrees, e.g. for XML output"""
+    sign = "-" if value < 0 else ""
+    whole, frac = divmod(abs(value), SCALE)
+    return f"{sign}{whole}.{frac:07d}"
+
+
+def osm_tags(properties):
+    """Returns the (key, value) pairs to write for a feature's tags, dropping nulls"""
+    return [(k, str(v)) for k, v in properties.items() if v is not None]
+
+
+class NodeTable:
+    """
+    Assigns node IDs to coordinates, giving coincident coordinates the same ID.
+    Tagged nodes (e.g. points of interest) always get a new ID of their own.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.last_id = 0
+
+    def new_id(self):
+        self.last_id -= 1
+        return self.last_id
+
+    def lookup(self, position):
+        """
+        Returns (id, lon, lat, is_new) for a position, where lon and lat are in fixed
+        precision form
+        """
+        key = (to_fixed(position[0]), to_fixed(position[1]))
+        node_id = self.ids.get(key)
+        if node_id is not None:
+            return node_id, key[0], key[1], False
+        node_id = self.ids[key] = self.new_id()
+        return node_id, key[0], key[1], True
+
+
+def point_parts(geometry):
+    if geometry["type"] == "Point":
+        return [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPoint":
+        return geometry["coordinates"]
+    return []
+
+
+def line_parts(geometry):
+    if geometry["type"] == "LineString":
+        return [geometry["coordinates"]]
+    elif geometry["type"] in ("MultiLineString", "Polygon"):
+        return geometry["coordinates"]
+    elif geometry["type"] == "MultiPolygon":
+        return [ring for polygon in geometry["coordinates"] for ring in polygon]
+    return []
+
+
+class OsmBuilder:
+    """
+    Converts features into a stream of OSM objects. Callbacks receive each new node
+    (as id, lon, lat, tags, with fixed precision coordinates) and each way (as id,
+    node_ids, tags) as soon as they're known.
+    """
+
+    def __init__(self, on_node, on_way):
+        self.nodes = NodeTable()
+        self.last_way_id = 0
+        self.on_node = on_node
+        self.on_way = on_way
+
+    def add(self, feature):
+        geometry = feature.get("geometry")
+        if geometry is None:
+            return
+        if geometry["type"] == "GeometryCollection":
+            for part in geometry["geometries"]:
+                self.add({"properties": feature["properties"], "geometry": part})
+            return
+
+        tags = osm_tags(feature["properties"])
+
+        for position in point_parts(geometry):
+            self.on_node(
+                self.nodes.new_id(), to_fixed(position[0]), to_fixed(position[1]), tags
+            )
+
+        for line in line_parts(geometry):
+            refs = []
+            for position in line:
+                node_id, lon, lat, is_new = self.nodes.lookup(position)
+                if is_new:
+                    self.on_node(node_id, lon, lat, ())
+                # OSM doesn't allow a way to visit the same node twice in a row
+                if not refs or refs[-1] != node_id:
+                    refs.append(node_id)
+            if len(refs) < 2:
+                continue
+            self.last_way_id -= 1
+            self.on_way(self.last_way_id, refs, tags)
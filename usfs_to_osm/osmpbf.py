@@ -0,0 +1,214 @@
+"""
+Streaming OSM PBF (.osm.pbf) output.
+
+The PBF format is a sequence of zlib-compressed protobuf blocks of up to 8000 objects
+each (see https://wiki.openstreetmap.org/wiki/PBF_Format). Nodes are written as dense
+node blocks as soon as a block fills up, and way blocks are spooled to a temporary file
+and copied after the last node block, since readers expect all nodes first. The
+messages are simple enough that we encode them by hand rather than depending on a
+protobuf library.
+
+Compression is the most expensive part of writing a block, so blocks are compressed on
+a pool of threads (zlib releases the GIL) while the next block is being built, and
+written out in order as they finish.
+"""
+
+import collections
+import concurrent.futures
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+
+from .osm import MAX_WAY_NODES, OsmBuilder
+
+BLOCK_SIZE = 8000
+
+# How many compressed blocks may be waiting to be written before we wait for them
+MAX_PENDING = 32
+
+
+def varint(value):
+    """Encodes a non-negative integer (or a negative int64, as two's complement)"""
+    if 0 <= value < 0x80:
+        return bytes((value,))
+    value &= 0xFFFFFFFFFFFFFFFF
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def field_varint(field, value):
+    return varint(field << 3) + varint(value)
+
+
+def field_bytes(field, data):
+    return varint(field << 3 | 2) + varint(len(data)) + data
+
+
+def packed(values):
+    """Encodes a sequence of non-negative integers as packed varints"""
+    out = bytearray()
+    append = out.append
+    for value in values:
+        while value >= 0x80:
+            append((value & 0x7F) | 0x80)
+            value >>= 7
+        append(value)
+    return bytes(out)
+
+
+def field_packed(field, values):
+    return field_bytes(field, packed(values))
+
+
+def deltas(values):
+    """Delta-encodes values and zigzags them, as for packed sint64 fields"""
+    previous = (0, *values[:-1])
+    return [((d << 1) ^ (d >> 63)) for d in map(int.__sub__, values, previous)]
+
+
+class StringTable:
+    def __init__(self):
+        self.indexes = {"": 0}
+
+    def index(self, string):
+        index = self.indexes.get(string)
+        if index is None:
+            index = self.indexes[string] = len(self.indexes)
+        return index
+
+    def encode(self):
+        return b"".join(field_bytes(1, s.encode()) for s in self.indexes)
+
+
+def primitive_block(strings, group):
+    return field_bytes(1, strings.encode()) + field_bytes(2, group)
+
+
+def dense_nodes_block(nodes):
+    """Encodes (id, lon, lat, tags) tuples as a PrimitiveBlock of dense nodes"""
+    strings = StringTable()
+    ids, lons, lats, tags = zip(*nodes)
+
+    dense = (
+        field_packed(1, deltas(ids))
+        + field_packed(8, deltas(lats))
+        + field_packed(9, deltas(lons))
+    )
+    if any(tags):
+        keys_vals = []
+        for node_tags in tags:
+            for k, v in node_tags:
+                keys_vals.append(strings.index(k))
+                keys_vals.append(strings.index(v))
+            keys_vals.append(0)
+        dense += field_packed(10, keys_vals)
+
+    return primitive_block(strings, field_bytes(2, dense))
+
+
+def ways_block(ways):
+    """Encodes (id, refs, tags) tuples as a PrimitiveBlock of ways"""
+    strings = StringTable()
+    group = bytearray()
+
+    for way_id, refs, tags in ways:
+        way = field_varint(1, way_id)
+        if tags:
+            way += field_packed(2, [strings.index(k) for k, _ in tags])
+            way += field_packed(3, [strings.index(v) for _, v in tags])
+        way += field_packed(8, deltas(refs))
+        group += field_bytes(3, way)
+
+    return primitive_block(strings, bytes(group))
+
+
+def header_block():
+    return (
+        field_bytes(4, b"OsmSchema-V0.6")
+        + field_bytes(4, b"DenseNodes")
+        + field_bytes(16, b"usfs-to-osm")
+    )
+
+
+def blob(blob_type, data):
+    """Compresses and frames a block, returning the bytes to write to the file"""
+    body = field_varint(2, len(data)) + field_bytes(3, zlib.compress(data))
+    header = field_bytes(1, blob_type) + field_varint(3, len(body))
+    return struct.pack(">I", len(header)) + header + body
+
+
+class BlobQueue:
+    """Compresses blocks on a thread pool and writes them to a stream in order"""
+
+    def __init__(self, pool, stream):
+        self.pool = pool
+        self.stream = stream
+        self.pending = collections.deque()
+
+    def submit(self, encode, items, blob_type=b"OSMData"):
+        # encoding is done on the pool too; it holds the GIL, but it lets the main
+        # thread get on with building the next block in the meantime
+        self.pending.append(self.pool.submit(lambda: blob(blob_type, encode(items))))
+        while len(self.pending) > MAX_PENDING:
+            self.stream.write(self.pending.popleft().result())
+
+    def drain(self):
+        while self.pending:
+            self.stream.write(self.pending.popleft().result())
+
+
+class OsmPbfWriter:
+    """Writes features as an OSM PBF file, sharing nodes between ways that touch"""
+
+    encoded = False
+    # lines are split into ways the API will accept, unless --max-nodes says otherwise
+    max_way_nodes = MAX_WAY_NODES
+
+    def __init__(self, stream, threads=None):
+        self.pool = concurrent.futures.ThreadPoolExecutor(threads or os.cpu_count())
+        self.node_blobs = BlobQueue(self.pool, stream)
+        self.spool = tempfile.TemporaryFile()
+        self.way_blobs = BlobQueue(self.pool, self.spool)
+        self.stream = stream
+        self.nodes = []
+        self.ways = []
+        self.builder = OsmBuilder(self.add_node, self.add_way)
+
+    def __enter__(self):
+        self.node_blobs.submit(lambda _: header_block(), None, b"OSMHeader")
+        return self
+
+    def __exit__(self, *exc):
+        if self.nodes:
+            self.node_blobs.submit(dense_nodes_block, self.nodes)
+        if self.ways:
+            self.way_blobs.submit(ways_block, self.ways)
+        self.node_blobs.drain()
+        self.way_blobs.drain()
+        self.pool.shutdown()
+
+        self.spool.seek(0)
+        shutil.copyfileobj(self.spool, self.stream)
+        self.spool.close()
+        self.stream.flush()
+
+    def write(self, feature):
+        self.builder.add(feature)
+
+    def add_node(self, node_id, lon, lat, tags):
+        self.nodes.append((node_id, lon, lat, tags))
+        if len(self.nodes) >= BLOCK_SIZE:
+            self.node_blobs.submit(dense_nodes_block, self.nodes)
+            self.nodes = []
+
+    def add_way(self, way_id, refs, tags):
+        self.ways.append((way_id, refs, tags))
+        if len(self.ways) >= BLOCK_SIZE:
+            self.way_blobs.submit(ways_block, self.ways)
+            self.ways = []
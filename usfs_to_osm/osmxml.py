@@ -0,0 +1,58 @@
+"""
+Streaming OSM XML (.osm) output.
+
+OSM XML lists all nodes before any ways. Nodes are written to the output as soon as
+they're first seen, while ways are spooled to a temporary file and copied after the
+last node, so the document is never held in memory (only the table of node
+coordinates, which is needed to share nodes between ways).
+"""
+
+import shutil
+import tempfile
+from xml.sax.saxutils import quoteattr
+
+from .osm import MAX_WAY_NODES, OsmBuilder, format_fixed
+
+
+def tag_elements(tags):
+    return "".join(f"<tag k={quoteattr(k)} v={quoteattr(v)}/>" for k, v in tags)
+
+
+class OsmXmlWriter:
+    """Writes features as OSM XML, sharing nodes between ways that touch"""
+
+    encoded = False
+    # lines are split into ways the API will accept, unless --max-nodes says otherwise
+    max_way_nodes = MAX_WAY_NODES
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.ways = tempfile.TemporaryFile()
+        self.builder = OsmBuilder(self.write_node, self.write_way)
+
+    def __enter__(self):
+        self.stream.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.stream.write(b'<osm version="0.6" generator="usfs-to-osm">\n')
+        return self
+
+    def __exit__(self, *exc):
+        self.ways.seek(0)
+        shutil.copyfileobj(self.ways, self.stream)
+        self.ways.close()
+        self.stream.write(b"</osm>\n")
+        self.stream.flush()
+
+    def write(self, feature):
+        self.builder.add(feature)
+
+    def write_node(self, node_id, lon, lat, tags):
+        attrs = f'id="{node_id}" lat="{format_fixed(lat)}" lon="{format_fixed(lon)}"'
+        if tags:
+            line = f"  <node {attrs}>{tag_elements(tags)}</node>\n"
+        else:
+            line = f"  <node {attrs}/>\n"
+        self.stream.write(line.encode())
+
+    def write_way(self, way_id, refs, tags):
+        nds = "".join(f'<nd ref="{ref}"/>' for ref in refs)
+        self.ways.write(f'  <way id="{way_id}">{nds}{tag_elements(tags)}</way>\n'.encode())
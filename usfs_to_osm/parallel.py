@@ -0,0 +1,150 @@
+"""
+Runs a converter over chunks of features on a pool of worker processes.
+
+Input is split into chunks of raw newline-delimited GeoJSON lines (or of feature
+dicts, when reading a GDAL dataset), and each worker decodes, converts and encodes a
+whole chunk at a time, so only one message per chunk crosses the process boundary.
+At most a few chunks per worker are in flight at once, so memory use stays bounded no
+matter how big the input is.
+"""
+
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing
+import sys
+
+from . import codec, geometry, rawfeature, stats
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def chunked(iterable, size):
+    """Splits iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _init_worker(backend):
+    codec.select(backend)
+    # forked workers start with a copy of this process's counts, which it reports
+    # itself; only hand back what's counted from here on
+    stats.take()
+
+
+def _start_method():
+    # Workers are started when the first chunk is submitted, which (with `all`) is
+    # while other threads are reading and writing other datasets, and forking a
+    # multithreaded process can deadlock. A fork server is started from a fresh
+    # process instead, and forks the workers from that.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return None
+
+
+def make_pool(workers):
+    """
+    Starts a pool of worker processes. Tasks carry the converter they should run, so
+    one pool can be shared between several conversions.
+    """
+    return concurrent.futures.ProcessPoolExecutor(
+        workers,
+        mp_context=_start_method(),
+        initializer=_init_worker,
+        initargs=(codec.backend,),
+    )
+
+
+def _convert_chunk(feature_to_osm, bbox, encode, raw, chunk):
+    return _convert_items(feature_to_osm, bbox, encode, raw, chunk), stats.take()
+
+
+def _convert_items(feature_to_osm, bbox, encode, raw, chunk):
+    if raw:
+        return list(rawfeature.convert_lines(feature_to_osm, chunk))
+
+    results = []
+    for item in chunk:
+        if isinstance(item, bytes):
+            if not item.strip():
+                continue
+            feature = codec.loads(item)
+            if bbox is not None and not geometry.intersects_bbox(feature["geometry"], bbox):
+                continue
+        else:
+            feature = item
+
+        try:
+            result = feature_to_osm(feature)
+        except Exception as e:
+            print(feature["properties"], file=sys.stderr)
+            raise e
+
+        if result:
+            results.append(codec.dumps(result) if encode else result)
+    return results
+
+
+def convert_parallel(
+    feature_to_osm,
+    items,
+    workers,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    ordered=True,
+    bbox=None,
+    encode=False,
+    raw=False,
+    pool=None,
+):
+    """
+    Converts items (newline-delimited GeoJSON lines or feature dicts) with feature_to_osm
+    on a pool of worker processes, yielding the results. Results come out in input order
+    unless ordered is False, in which case each chunk is yielded as soon as it's done.
+    If encode is True, results are yielded as encoded JSON rather than dicts.
+
+    bbox is only applied to lines; feature dicts are assumed to be filtered already.
+    If raw is True, items must be lines, and they're converted without decoding their
+    geometry (see rawfeature); the caller decides when that's safe, i.e. when there's
+    no bbox and nothing but the properties will change.
+
+    A pool of the given number of workers is started for the conversion, unless an
+    existing pool (from make_pool) is passed in.
+    """
+    if pool is None:
+        with make_pool(workers) as pool:
+            yield from convert_parallel(
+                feature_to_osm, items, workers, chunk_size, ordered, bbox, encode, raw, pool
+            )
+        return
+
+    max_pending = workers * 4
+    pending = collections.deque()
+
+    for chunk in chunked(items, chunk_size):
+        pending.append(pool.submit(_convert_chunk, feature_to_osm, bbox, encode, raw, chunk))
+        if len(pending) < max_pending:
+            continue
+
+        if ordered:
+            yield from _chunk_results(pending.popleft())
+        else:
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                pending.remove(future)
+                yield from _chunk_results(future)
+
+    if ordered:
+        for future in pending:
+            yield from _chunk_results(future)
+    else:
+        for future in concurrent.futures.as_completed(pending):
+            yield from _chunk_results(future)
+
+
+def _chunk_results(future):
+    results, counts = future.result()
+    stats.merge(counts)
+    return results
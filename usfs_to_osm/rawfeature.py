@@ -0,0 +1,89 @@
+"""
+Converts newline-delimited GeoJSON features without decoding their geometry.
+
+The converters only ever replace a feature's properties, and for line features the
+coordinate arrays are most of the bytes, so decoding and re-encoding them is mostly
+wasted work. Instead we decode just the "properties" object, and splice the converted
+tags back into the original text, leaving the rest of the line (including the
+geometry) exactly as it was.
+
+This relies on "properties" being the first member of the feature (after "type") and
+"geometry" following it, which is how both ogr2ogr and jq write features. Lines are
+located by position: the properties object must run from the "properties" key to the
+last "geometry" key (which can't appear inside the geometry, since that only contains
+numbers and type names), and it must decode as a single object. Any line that doesn't
+look like that falls back to a full decode.
+"""
+
+import re
+import sys
+
+from . import codec
+
+PROPERTIES_START = re.compile(rb'\s*\{\s*(?:"type"\s*:\s*"Feature"\s*,\s*)?"properties"\s*:\s*')
+
+GEOMETRY_KEY = b'"geometry"'
+
+
+def split_line(line):
+    """
+    Splits a line into (head, properties, tail), where properties is the decoded
+    properties object and head + properties + tail is the original line. Returns None
+    if the line isn't laid out as expected.
+    """
+    match = PROPERTIES_START.match(line)
+    if match is None:
+        return None
+
+    start = match.end()
+    geometry = line.rfind(GEOMETRY_KEY, start)
+    if geometry < 0:
+        return None
+
+    text = line[start:geometry].rstrip()
+    if not text.endswith(b","):
+        return None
+    text = text[:-1]
+
+    try:
+        properties = codec.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(properties, dict):
+        return None
+
+    return line[:start], properties, line[start + len(text) :].rstrip(b"\r\n")
+
+
+def convert_line(feature_to_osm, line):
+    """
+    Converts one line of newline-delimited GeoJSON with feature_to_osm, returning the
+    converted feature as JSON (bytes, without a trailing newline), or None if the
+    feature was dropped.
+    """
+    parts = split_line(line)
+    if parts is None:
+        result = feature_to_osm(codec.loads(line))
+        return codec.dumps(result) if result else None
+
+    head, properties, tail = parts
+    result = feature_to_osm({"type": "Feature", "properties": properties})
+    if not result:
+        return None
+
+    return head + codec.dumps(result["properties"]) + tail
+
+
+def convert_lines(feature_to_osm, lines):
+    """Converts lines of newline-delimited GeoJSON, yielding JSON for each result"""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            result = convert_line(feature_to_osm, line)
+        except Exception as e:
+            print(line.strip().decode(errors="replace"), file=sys.stderr)
+            raise e
+
+        if result is not None:
+            yield result
@@ -0,0 +1,244 @@
+"""
+Conversion of USDA Recreation Opportunities attributes to OSM-compatible tags.
+"""
+
+import functools
+import re
+import time
+
+from . import names, schema, stats
+from .names import NameNormalizer
+
+# Columns the input must have; any others that are missing are treated as null
+REQUIRED_COLUMNS = ("MARKERACTIVITY", "RECAREANAME")
+
+ABBREVIATIONS = {
+    "N": "North",
+    "S": "South",
+    "SO": "South",
+    "E": "East",
+    "W": "West",
+    "MT": "Mount",
+    "MTN": "Mountian",
+    "NTL": "National",
+    "NATL": "National",
+    "CG": "Campground",
+    "CK": "Creek",
+    "CR": "Creek",
+    "CRK": "Creek",
+    "CYN": "Canyon",
+    "FK": "Fork",
+    "I.T.": "Interpretive Trail",  # include only I.T., not IT (the word 'it')
+    "LK": "Lake",
+    "LKS": "Lakes",
+    "PK": "Park",
+    "RD": "Road",
+    "ST": "Saint",
+    "TH": "Trailhead",
+    "TR": "Trail",
+    "SMT": "Snowmobile Trail",
+    "HWT": "Hunter Walking Trail",
+    "NRT": "National Recreation Trail",
+    "NST": "National Scenic Trail",
+    # specific long distance trail names
+    "PCT": "Pacific Crest Trail",
+    "PCNST": "Pacific Crest National Scenic Trail",
+    "CDT": "Continental Divide Trail",
+    "GWT": "Great Western Trail",
+    "INHT": "Iditarod National Historic Trail",
+    "TRT": "Tahoe Rim Trail",
+    "FNST": "Florida National Scenic Trail",
+    "LSHT": "Lone Star Hiking Trail",
+    "MCCT": "Michigan Cross-Country Cycle Trail",
+    "MCCCT": "Michigan Cross-Country Cycle Trail",
+}
+
+SPECIAL_CASES = {
+    "ATV": "ATV",
+    "OHV": "OHV",
+    "XC": "XC",
+    "OF": "of",
+    "THE": "the",
+    "IN": "in",
+    "TO": "to",
+}
+
+BAD_WORDS = {
+    # "Filler" words to delete from names
+    "FDR",
+}
+
+BAD_NAMES = {
+    # "Names" that should be considered equivalent to null values
+    "NO NAME",
+    "UNNAMED",
+    "UN-NAMED",
+    "UNKNOWN",
+    "LOCAL",
+    "MAJOR LOCAL",
+    "HUC",  # some roads near Rainier, meaning unknown
+    "(FDR)",  # Forest Development Road
+    "MRS",  # Minimum Road System
+    "2B DECOMM'D",  # to be decommissioned
+}
+
+def name(props):
+    return normalize_name(props["RECAREANAME"])
+
+
+NAME_NORMALIZER = NameNormalizer(
+    ABBREVIATIONS,
+    special_cases=SPECIAL_CASES,
+    bad_words=BAD_WORDS,
+    bad_names=BAD_NAMES,
+    bad_name_patterns=names.BAD_NAME_PATTERNS,
+    suffix="Trailhead",
+    suffix_words={"Trailhead"},
+    word_chars="A-Za-z",
+    skip_token=r"#\d+",
+)
+
+
+@stats.cached("recsites name", maxsize=65536)
+def normalize_name(name):
+    return NAME_NORMALIZER(name)
+
+
+def place_name(props):
+    return normalize_place_name(props["RECAREANAME"])
+
+
+# Like NAME_NORMALIZER, but for sites other than trailheads, whose names are used as is
+PLACE_NAME_NORMALIZER = NameNormalizer(
+    ABBREVIATIONS,
+    special_cases=SPECIAL_CASES,
+    bad_words=BAD_WORDS,
+    bad_names=BAD_NAMES,
+    bad_name_patterns=names.BAD_NAME_PATTERNS,
+    word_chars="A-Za-z",
+    skip_token=r"#\d+",
+)
+
+
+@stats.cached("recsites place name", maxsize=65536)
+def normalize_place_name(name):
+    return PLACE_NAME_NORMALIZER(name)
+
+
+def website(props):
+    return props.get("RECAREAURL")
+
+
+def reservation_website(props):
+    # TODO parse https://www.recreation.gov/camping/campgrounds/[[:digit:]]+ URLs out of FEEDESCRIPTION field
+    return None
+
+
+def trailhead_to_osm(props):
+    tags = {}
+
+    tags["highway"] = "trailhead"
+    # tags["RECAREANAME"] = props["RECAREANAME"]
+    tags["name"] = name(props)
+    tags["website"] = website(props)
+
+    return tags
+
+
+def place_to_osm(fixed_tags, props):
+    """Converts a site that's tagged with fixed_tags plus its name and website"""
+    tags = dict(fixed_tags)
+
+    tags["name"] = place_name(props)
+    tags["website"] = website(props)
+
+    return tags
+
+
+# The function that converts each supported MARKERACTIVITY; features with any other
+# activity are dropped
+MAPPERS = {
+    "Trailhead": trailhead_to_osm,
+    "Viewing Scenery": functools.partial(place_to_osm, {"tourism": "viewpoint"}),
+    # TODO: OHV Camping, Horse Camping, ...
+    "Campground Camping": functools.partial(place_to_osm, {"tourism": "camp_site"}),
+    "Group Camping": functools.partial(
+        place_to_osm, {"tourism": "camp_site", "group_only": "yes"}
+    ),
+    "Dispersed Camping": functools.partial(
+        place_to_osm, {"tourism": "camp_site", "backcountry": "yes"}
+    ),
+    "Picnicking": functools.partial(place_to_osm, {"tourism": "picnic_site"}),
+    # TODO: or amenity=ranger_station?
+    "Visitor Centers": functools.partial(
+        place_to_osm, {"tourism": "information", "information": "visitor_centre"}
+    ),
+}
+
+def sql_string(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+# Selects the features with a supported activity, when GDAL reads the input
+WHERE = f"MARKERACTIVITY IN ({', '.join(map(sql_string, MAPPERS))})"
+
+# Stats labels for each activity (see properties_to_osm)
+ACTIVITY_LABELS = {activity: f"recsites {activity}" for activity in MAPPERS}
+
+
+def properties_to_osm(props):
+    """Converts a feature properties dict to OSM tags"""
+    mapper = MAPPERS.get(props.get("MARKERACTIVITY"))
+    if mapper is None:
+        return None
+
+    tags = mapper(props)
+    tags["operator"] = "US Forest Service"
+
+    return tags
+
+
+# The activity of a raw newline-delimited GeoJSON feature, found without decoding it
+ACTIVITY_PATTERN = re.compile(rb'"MARKERACTIVITY"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+MAPPED_ACTIVITIES = frozenset(activity.encode() for activity in MAPPERS)
+
+
+def accepts_line(line):
+    """
+    Returns whether a line of newline-delimited GeoJSON could be a supported site,
+    so the rest can be skipped before they're decoded. This errs on the side of
+    keeping lines; anything it can't rule out is decoded and checked as usual.
+    """
+    match = ACTIVITY_PATTERN.search(line)
+    if match is None:
+        return bool(line.strip())
+
+    activity = match.group(1)
+    if activity in MAPPED_ACTIVITIES or b"\\" in activity:
+        return True
+
+    stats.count(f"recsites {activity.decode(errors='replace')} skipped")
+    return False
+
+
+def feature_to_osm(feature):
+    """Converts a single GeoJSON feature to OSM-compatible form"""
+    start = time.perf_counter()
+    props = feature["properties"]
+    if tags := properties_to_osm(props):
+        feature["properties"] = tags
+        # the whole conversion, reported per activity with its rate
+        stats.count_time(ACTIVITY_LABELS[props["MARKERACTIVITY"]], time.perf_counter() - start)
+        return feature
+    else:
+        return None
+
+
+def specialize(columns, fixed=False):
+    """
+    Checks that an input with the given columns can be converted, and returns the
+    feature_to_osm function to convert it with (see schema)
+    """
+    schema.check_columns("recsites", columns, REQUIRED_COLUMNS)
+    return feature_to_osm
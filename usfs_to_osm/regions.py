@@ -0,0 +1,138 @@
+"""
+Splitting output by region, so a single pass over a national dataset can produce a
+separate output for every state (or forest, or any other set of areas).
+
+Regions are read from either a GeoJSON file of polygons with a "name" property, or a
+text file with one "NAME XMIN YMIN XMAX YMAX" extent per line. Each feature is sent to
+every region it intersects. Candidate regions are found with a grid index over the
+region envelopes, so routing a feature only looks at the regions near it; for bbox
+regions the envelope test is the whole story (like ogr2ogr -spat), while polygon
+regions also get an exact intersection test with shapely.
+"""
+
+import json
+import math
+import re
+
+from . import geometry
+
+# Size of the grid index cells, in degrees
+CELL_SIZE = 1.0
+
+
+class Region:
+    def __init__(self, name, bbox, shape=None):
+        self.name = name
+        self.bbox = tuple(bbox)
+        self.shape = shape
+        self.prepared = None
+
+    def __repr__(self):
+        return f"Region({self.name!r}, {self.bbox})"
+
+    def intersects(self, feature_geometry, feature_bbox):
+        """Tests whether a feature intersects this region, given the feature's envelope"""
+        if not envelopes_intersect(self.bbox, feature_bbox):
+            return False
+        if self.shape is None:
+            return True
+        shapely = geometry.import_shapely()
+        if self.prepared is None:
+            self.prepared = shapely.geometry.shape(self.shape)
+            shapely.prepare(self.prepared)
+        return self.prepared.intersects(shapely.geometry.shape(feature_geometry))
+
+
+def envelopes_intersect(a, b):
+    return not (a[2] < b[0] or a[0] > b[2] or a[3] < b[1] or a[1] > b[3])
+
+
+def safe_name(name):
+    """Makes a region name safe to use in a file name"""
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "region"
+
+
+def load_regions(path):
+    """Reads regions from a GeoJSON file of named polygons or a text file of extents"""
+    if path.lower().endswith((".json", ".geojson")):
+        with open(path) as f:
+            collection = json.load(f)
+        regions = []
+        for feature in collection["features"]:
+            name = feature["properties"].get("name")
+            if not name:
+                raise ValueError(f"{path}: every region needs a name property")
+            bbox = geometry.bounds(feature["geometry"])
+            regions.append(Region(str(name), bbox, feature["geometry"]))
+    else:
+        regions = []
+        with open(path) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                name, *bbox = line.split()
+                if len(bbox) != 4:
+                    raise ValueError(f"{path}: expected NAME XMIN YMIN XMAX YMAX, got {line!r}")
+                regions.append(Region(name, map(float, bbox)))
+
+    names = [region.name for region in regions]
+    if len(set(map(safe_name, names))) != len(names):
+        raise ValueError(f"{path}: region names must be unique")
+    return regions
+
+
+def union_bbox(regions):
+    """Returns the envelope of all regions, e.g. to limit what's read from the input"""
+    return (
+        min(region.bbox[0] for region in regions),
+        min(region.bbox[1] for region in regions),
+        max(region.bbox[2] for region in regions),
+        max(region.bbox[3] for region in regions),
+    )
+
+
+def cell_range(bbox):
+    return (
+        range(math.floor(bbox[0] / CELL_SIZE), math.floor(bbox[2] / CELL_SIZE) + 1),
+        range(math.floor(bbox[1] / CELL_SIZE), math.floor(bbox[3] / CELL_SIZE) + 1),
+    )
+
+
+class RegionIndex:
+    """A grid index over region envelopes"""
+
+    def __init__(self, regions):
+        self.regions = list(regions)
+        self.cells = {}
+        for region in self.regions:
+            xs, ys = cell_range(region.bbox)
+            for x in xs:
+                for y in ys:
+                    self.cells.setdefault((x, y), []).append(region)
+
+    def candidates(self, bbox):
+        """Returns the regions whose envelopes might intersect bbox"""
+        xs, ys = cell_range(bbox)
+        if len(xs) == 1 and len(ys) == 1:
+            return self.cells.get((xs[0], ys[0]), ())
+        found = {}
+        for x in xs:
+            for y in ys:
+                for region in self.cells.get((x, y), ()):
+                    found[id(region)] = region
+        return found.values()
+
+    def route(self, feature):
+        """Returns the regions a feature belongs in"""
+        feature_geometry = feature.get("geometry")
+        if feature_geometry is None:
+            return []
+        bbox = geometry.bounds(feature_geometry)
+        if bbox is None:
+            return []
+        return [
+            region
+            for region in self.candidates(bbox)
+            if region.intersects(feature_geometry, bbox)
+        ]
@@ -0,0 +1,353 @@
+"""
+Conversion of USDA National Forest System Roads ('S_USA.RoadCore') attributes to
+OSM-compatible tags.
+"""
+
+import functools
+from types import MappingProxyType
+
+from . import schema, stats
+
+# Each road is split into segments by milepost; this column identifies the road (see merge)
+SEGMENT_ID = "ID"
+
+# Columns the input must have; any others that are missing are treated as null
+REQUIRED_COLUMNS = ("ID", "NAME")
+
+ABBREVIATIONS = {
+    "N": "North",
+    "S": "South",
+    "E": "East",
+    "W": "West",
+    "MTN": "Mountian",
+    "CG": "Campground",
+    "CR": "Creek",
+    "FK": "Fork",
+    "LK": "Lake",
+    "TS": "Timber Sale",
+    "T.S.": "Timber Sale",
+    "FY": "Fiscal Year",
+}
+
+BAD_WORDS = {
+    # "Filler" words to delete from names
+    "(FDR)",
+}
+
+BAD_NAMES = {
+    # "Names" that should be considered equivalent to null values
+    "NO NAME",
+    "UNNAMED",
+    "UN-NAMED",
+    "UNKNOWN",
+    "LOCAL",
+    "MAJOR LOCAL",
+    "HUC", # some roads near Rainier, meaning unknown
+    "(FDR)", # Forest Development Road
+    "MRS", # Minimum Road System
+    "2B DECOMM'D", # to be decommissioned
+    
+}
+
+def squeeze(string):
+    """Replace any runs of whitespace in string with a single space"""
+    return " ".join(string.split())
+
+def highway(props):
+    if props.get("FUNCTIONAL_CLASS") == "A - ARTERIAL":
+        return "unclassified"
+    else:
+        return "track"
+    
+def name(props):
+    return normalize_name(props["NAME"], props["ID"])
+
+@stats.cached("roads name", maxsize=65536)
+def normalize_name(name, id):
+    # Names repeat a lot (a road is usually split into many segments), so this is
+    # memoized on the only two columns it depends on
+    if not name or id in name or name in BAD_NAMES:
+        return None
+
+    name = squeeze(name.replace(".", " ")).strip()
+
+    if name.isnumeric() or name.startswith("FR") and name[2:].strip().isnumeric():
+        return None
+
+    words = []
+    for word in name.split():
+        word = word.upper()
+        if word in BAD_WORDS:
+            continue
+        elif word in ABBREVIATIONS:
+            word = ABBREVIATIONS[word]
+        else:
+            word = word[0] + word[1:].lower()
+        words.append(word)
+
+    if not words:
+        return None
+
+    if words[-1] != "Road":
+        words.append("Road") # FIXME or " Trail"
+        
+    return " ".join(words)
+
+def ref(props):
+    ref = props["ID"]
+    
+    if len(ref) == 7:
+        if ref.endswith("00000"):
+            return "NF " + ref[:2]
+        elif ref.endswith("000"):
+            return "FR " + ref[:4]
+        else:
+            return "FR " + ref[:4] + "-" + ref[4:]
+    else:
+        return "FR " + ref
+
+def operator(props):
+    if props.get("JURISDICTION") == "FS - FOREST SERVICE":
+        return "US Forest Service"
+    else:
+        return None
+
+SURFACE_MAP = {
+    "AC - ASPHALT": "asphalt",
+    "AGG - CRUSHED AGGREGATE OR GRAVEL": "gravel",
+    "BST - BITUMINOUS SURFACE TREATMENT": "chipseal",
+    "CSOIL - COMPACTED SOIL": "compacted",
+    "IMP - IMPROVED NATIVE MATERIAL": "gravel", # more like gravel than ground
+    "NAT - NATIVE MATERIAL": "ground",
+    "P - PAVED": "paved",
+    "PCC - PORTLAND CEMENT CONCRETE": "concrete",
+}
+
+def surface(props):
+    return SURFACE_MAP.get(props.get("SURFACE_TYPE"))
+
+SMOOTHNESS_MAP = {
+    # See https://wiki.openstreetmap.org/wiki/Key:smoothness
+    # and https://www.fs.usda.gov/Internet/FSE_DOCUMENTS/stelprd3793545.pdf
+    
+    # Level 5 roads are almost always paved (usually with asphalt or chipseal) and provide
+    # a high degree of comfort and convenience for travelers in passenger cars.
+    "5 - HIGH DEGREE OF USER COMFORT": "good",
+    # Level 4 roads are usually compacted and provide "moderate comfort at moderate speeds".
+    "4 - MODERATE DEGREE OF USER COMFORT": "intermediate",
+    # Level 3 roads are passable by prudent drivers in a passenger car. Comfort and convenience
+    # are "not a priority".
+    "3 - SUITABLE FOR PASSENGER CARS": "bad",
+    # Level 2 roads are open to use by high clearance vehicles. "Passenger car traffic, user
+    # comfort, and user convenience are not considerations".
+    "2 - HIGH CLEARANCE VEHICLES": "very_bad",
+    # Level 1 roads may technically be any type of road that are closed to vehicle traffic for
+    # for an extended period, so we can't be sure about their smoothness. In practice most L1
+    # roads are severely degraded and impassable by any vehicle.
+    "1 - BASIC CUSTODIAL CARE (CLOSED)": None,
+}
+
+def smoothness(props):
+    return SMOOTHNESS_MAP.get(props.get("OPER_MAINT_LEVEL"))
+
+def motor_vehicle(props):
+    return not (
+        props.get("OPENFORUSETO") != "ALL"
+        or props.get("OPER_MAINT_LEVEL") == "1 - BASIC CUSTODIAL CARE (CLOSED)"
+    )
+
+def disused(props):
+    return props.get("OBJECTIVE_MAINT_LEVEL") == "D - DECOMMISSION"
+
+def lanes(props):
+    lanes = props.get("LANES")
+    if lanes and lanes[0].isnumeric():
+        return lanes[0]
+    else:
+        return None
+        
+
+# Every tag other than name and ref depends only on these low-cardinality columns
+TEMPLATE_COLUMNS = (
+    "FUNCTIONAL_CLASS",
+    "JURISDICTION",
+    "SURFACE_TYPE",
+    "OPER_MAINT_LEVEL",
+    "LANES",
+    "OBJECTIVE_MAINT_LEVEL",
+    "OPENFORUSETO",
+)
+
+@stats.cached("roads tag template", maxsize=4096)
+def tag_template(values):
+    """
+    Computes the tags that depend only on TEMPLATE_COLUMNS, given a tuple of their
+    values. Returns the highway tag and a read-only mapping of the rest (which are
+    output after name and ref).
+    """
+    props = dict(zip(TEMPLATE_COLUMNS, values))
+    tags = {}
+
+    tags["operator"] = operator(props)
+    tags["surface"] = surface(props)
+    tags["smoothness"] = smoothness(props)
+    tags["lanes"] = lanes(props)
+
+    if disused(props):
+        tags["disused"] = "yes"
+
+    if not motor_vehicle(props):
+        tags["motor_vehicle"] = "no"
+
+    return highway(props), MappingProxyType(tags)
+
+def properties_to_osm(props, template_values=None):
+    """
+    Converts a feature properties dict to OSM tags. template_values fetches the values
+    of TEMPLATE_COLUMNS from props (see specialize); by default they're looked up by name.
+    """
+    # tags = {**props}
+    if template_values is None:
+        values = tuple(map(props.get, TEMPLATE_COLUMNS))
+    else:
+        values = template_values(props)
+    highway, template = tag_template(values)
+
+    tags = {}
+    tags["highway"] = highway
+    tags["name"] = name(props)
+    tags["ref"] = ref(props)
+    tags.update(template)
+
+    return tags
+    
+def feature_to_osm(feature, template_values=None):
+    """Converts a single GeoJSON feature to OSM-compatible form"""
+    feature["properties"] = properties_to_osm(feature["properties"], template_values)
+    return feature
+
+def specialize(columns, fixed=False):
+    """
+    Checks that an input with the given columns can be converted, and returns a
+    feature_to_osm function with its column accessors built for them. fixed is whether
+    every feature has exactly those columns (see schema.getter).
+    """
+    schema.check_columns("roads", columns, REQUIRED_COLUMNS)
+    return functools.partial(
+        feature_to_osm, template_values=schema.getter(columns, TEMPLATE_COLUMNS, fixed)
+    )
+
+
+# Columnar engine: the same mapping as properties_to_osm, computed a whole record batch
+# at a time with Arrow compute functions. Only the name is still normalized per row
+# (through the same memoized function). Must stay in sync with the functions above;
+# `just check-engines` compares the two.
+
+BATCH_COLUMNS = ("ID", "NAME") + TEMPLATE_COLUMNS
+
+def _lookup(pc, pa, column, mapping):
+    """Maps the values of column through a dict, giving null for anything not in it"""
+    keys = pa.array(list(mapping), pa.string())
+    values = pa.array(list(mapping.values()), pa.string())
+    return pc.take(values, pc.index_in(column, value_set=keys))
+
+def _equals(pc, column, value):
+    return pc.fill_null(pc.equal(column, value), False)
+
+def _ref_column(pc, pa, ids):
+    def prefixed(prefix, *parts):
+        return pc.binary_join_element_wise(prefix, *parts, "")
+
+    seven = _equals(pc, pc.utf8_length(ids), 7)
+    first2 = pc.utf8_slice_codeunits(ids, 0, 2)
+    first4 = pc.utf8_slice_codeunits(ids, 0, 4)
+    rest = pc.utf8_slice_codeunits(ids, 4)
+    return pc.case_when(
+        pc.make_struct(
+            pc.and_(seven, pc.fill_null(pc.ends_with(ids, "00000"), False)),
+            pc.and_(seven, pc.fill_null(pc.ends_with(ids, "000"), False)),
+            seven,
+        ),
+        prefixed("NF ", first2),
+        prefixed("FR ", first4),
+        prefixed("FR ", first4, "-", rest),
+        prefixed("FR ", ids),
+    )
+
+def columns_to_osm(table):
+    """
+    Converts a pyarrow Table or RecordBatch of road attributes to a list of OSM tag
+    dicts, one per row, identical to what properties_to_osm returns. Like specialize,
+    missing optional columns are treated as null.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    present = set(table.schema.names)
+
+    def column(name):
+        if name not in present:
+            return pa.nulls(len(table), pa.string())
+        return table.column(name).cast(pa.string())
+
+    null = pa.scalar(None, pa.string())
+
+    first_lane = pc.utf8_slice_codeunits(column("LANES"), 0, 1)
+    # the columns that make up tag_template's result, in the same order
+    template = {
+        "highway": pc.if_else(
+            _equals(pc, column("FUNCTIONAL_CLASS"), "A - ARTERIAL"), "unclassified", "track"
+        ),
+        "operator": pc.if_else(
+            _equals(pc, column("JURISDICTION"), "FS - FOREST SERVICE"), "US Forest Service", null
+        ),
+        "surface": _lookup(pc, pa, column("SURFACE_TYPE"), SURFACE_MAP),
+        "smoothness": _lookup(pc, pa, column("OPER_MAINT_LEVEL"), SMOOTHNESS_MAP),
+        "lanes": pc.if_else(
+            pc.fill_null(pc.utf8_is_numeric(first_lane), False), first_lane, null
+        ),
+        "disused": pc.if_else(
+            _equals(pc, column("OBJECTIVE_MAINT_LEVEL"), "D - DECOMMISSION"), "yes", null
+        ),
+        "motor_vehicle": pc.if_else(
+            pc.or_(
+                pc.fill_null(pc.not_equal(column("OPENFORUSETO"), "ALL"), True),
+                _equals(pc, column("OPER_MAINT_LEVEL"), "1 - BASIC CUSTODIAL CARE (CLOSED)"),
+            ),
+            "no",
+            null,
+        ),
+    }
+
+    # Like tag_template, build each distinct combination of those tags once: number
+    # the combinations, and look them up by number per row
+    codes = np.zeros(len(table), dtype=np.int64)
+    for values in template.values():
+        encoded = values.dictionary_encode()
+        if isinstance(encoded, pa.ChunkedArray):
+            encoded = encoded.combine_chunks()
+        size = len(encoded.dictionary) + 1
+        codes = codes * size + pc.fill_null(encoded.indices, size - 1).to_numpy()
+    unique, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+
+    templates = []
+    for row in first.tolist():
+        tags = {key: values[row].as_py() for key, values in template.items()}
+        highway = tags.pop("highway")
+        # disused and motor_vehicle are only present when set
+        for key in ("disused", "motor_vehicle"):
+            if tags[key] is None:
+                del tags[key]
+        templates.append((highway, tags))
+
+    names = [
+        normalize_name(name, id)
+        for name, id in zip(column("NAME").to_pylist(), column("ID").to_pylist())
+    ]
+
+    refs = _ref_column(pc, pa, column("ID")).to_pylist()
+    return [
+        {"highway": templates[code][0], "name": name, "ref": ref, **templates[code][1]}
+        for code, name, ref in zip(inverse.tolist(), names, refs)
+    ]
@@ -0,0 +1,111 @@
+"""
+Checking an input's columns once, and building column accessors specialized to them.
+
+Converters look up the same columns on every feature. Rather than find out that a
+column is missing from a KeyError halfway through a national run, each converter's
+specialize() function is given the input's columns up front (from the first feature,
+or the first record batch's schema). It fails with a SchemaError if a column it
+needs is missing, and otherwise returns a converter whose column accessors were built
+for those columns. When every feature is known to have the same columns (as when
+GDAL reads a dataset), present columns are fetched with operator.itemgetter and
+absent optional ones are constant None. Newline-delimited GeoJSON features can each
+have different properties, so for those every optional column is looked up with
+dict.get.
+"""
+
+import itertools
+import operator
+
+from . import codec
+
+
+class SchemaError(ValueError):
+    """The input doesn't have a column that the converter needs"""
+
+
+def check_columns(dataset, columns, required):
+    """Raises SchemaError if any of the required columns isn't in columns"""
+    missing = [column for column in required if column not in columns]
+    if missing:
+        raise SchemaError(
+            f"the input doesn't look like {dataset} data: missing column(s) "
+            f"{', '.join(missing)} (it has: {', '.join(columns) or 'no columns'})"
+        )
+
+
+class ColumnGetter:
+    """
+    Returns a tuple of the values of some columns from a properties dict, with None for
+    the columns that the input doesn't have
+    """
+
+    def __init__(self, wanted, present):
+        self.positions = [i for i, column in enumerate(wanted) if column in present]
+        self.defaults = (None,) * len(wanted)
+        self.fetch = None
+        if self.positions:
+            self.fetch = operator.itemgetter(*(wanted[i] for i in self.positions))
+
+    def __call__(self, props):
+        values = list(self.defaults)
+        if len(self.positions) == 1:
+            values[self.positions[0]] = self.fetch(props)
+        elif self.positions:
+            for position, value in zip(self.positions, self.fetch(props)):
+                values[position] = value
+        return tuple(values)
+
+
+class OptionalGetter:
+    """
+    Returns a tuple of the values of some columns from a properties dict, with None for
+    any that it doesn't have
+    """
+
+    def __init__(self, wanted):
+        self.wanted = tuple(wanted)
+        self.fetch = operator.itemgetter(*self.wanted) if len(self.wanted) > 1 else None
+
+    def __call__(self, props):
+        # usually every feature has every column, which itemgetter fetches fastest
+        if self.fetch is not None:
+            try:
+                return self.fetch(props)
+            except KeyError:
+                pass
+        return tuple(map(props.get, self.wanted))
+
+
+def getter(columns, wanted, fixed=False):
+    """
+    Returns a function that takes a properties dict and returns a tuple of the values of
+    the wanted columns, for an input with the given columns. If fixed is True, every
+    feature of the input has exactly those columns, and it's an itemgetter when every
+    wanted column is present; otherwise no column is assumed to be present.
+    """
+    if not fixed:
+        return OptionalGetter(wanted)
+    if len(wanted) > 1 and all(column in columns for column in wanted):
+        return operator.itemgetter(*wanted)
+    return ColumnGetter(wanted, set(columns))
+
+
+def peek_columns(items):
+    """
+    Returns the input's columns, from the first of items (raw newline-delimited GeoJSON
+    lines, feature dicts or (geometry_column, RecordBatch) pairs), and an iterator over
+    all the items. The columns are None if there are no items.
+    """
+    items = iter(items)
+    for first in items:
+        if isinstance(first, bytes):
+            if not first.strip():
+                continue
+            columns = list(codec.loads(first)["properties"])
+        elif isinstance(first, tuple):
+            geometry_name, batch = first
+            columns = [name for name in batch.schema.names if name != geometry_name]
+        else:
+            columns = list(first["properties"])
+        return columns, itertools.chain([first], items)
+    return None, iter(())
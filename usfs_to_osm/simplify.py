@@ -0,0 +1,182 @@
+"""
+Simplification of lines with the Douglas-Peucker algorithm, to drop vertices that
+are closer together than any mapper needs.
+
+Lines are simplified in batches. The coordinates of a whole batch are projected to
+meters (with an equirectangular projection around each line's mean latitude) into one
+NumPy array, and Douglas-Peucker runs on every line of the batch at once: each pass
+finds the farthest vertex from every open span of every line, and splits the spans
+where it's farther than the tolerance, until none are left.
+
+A line's endpoints are always kept, and so is any vertex where another line ends, so
+that lines which were connected before simplification still are. Since that needs the
+endpoints of the whole dataset, all features are held until the input ends.
+"""
+
+import math
+
+from . import osm, stats
+
+DEFAULT_BATCH_SIZE = 4096
+
+# Mean radius of the Earth, in meters
+EARTH_RADIUS = 6_371_008.8
+
+METERS_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+
+
+def line_parts(geometry):
+    if geometry is None:
+        return []
+    if geometry["type"] == "LineString":
+        return [geometry["coordinates"]]
+    elif geometry["type"] == "MultiLineString":
+        return geometry["coordinates"]
+    return []
+
+
+def position_keys(positions):
+    """
+    Returns an int64 key for each row of a (n, 2+) array of positions, equal for
+    positions that snap to the same OSM node
+    """
+    import numpy as np
+
+    fixed = np.rint(positions[:, :2] * osm.SCALE).astype(np.int64)
+    return fixed[:, 0] * (1 << 32) + fixed[:, 1]
+
+
+def endpoint_keys(features):
+    """Returns a sorted array of the keys (see position_keys) of every line's endpoints"""
+    import numpy as np
+
+    ends = [
+        (line[0][0], line[0][1], line[-1][0], line[-1][1])
+        for feature in features
+        for line in line_parts(feature.get("geometry"))
+        if line
+    ]
+    if not ends:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(position_keys(np.array(ends, dtype=float).reshape(-1, 2)))
+
+
+def douglas_peucker(xy, keep, tolerance):
+    """
+    Simplifies the lines in xy (a (n, 2) array of projected coordinates, of lines laid
+    end to end) in place by adding to keep, a boolean array that's initially True for
+    the vertices that must be kept, including the first and last vertex of every line.
+    (A line's last vertex and the next line's first are adjacent, so there's never
+    anything between them to simplify.)
+    """
+    import numpy as np
+
+    kept = np.flatnonzero(keep)
+    starts, ends = kept[:-1], kept[1:]
+
+    while True:
+        open_spans = ends - starts >= 2
+        starts, ends = starts[open_spans], ends[open_spans]
+        if not len(starts):
+            return
+
+        # every vertex inside every span, and the span it belongs to
+        lengths = ends - starts - 1
+        offsets = np.zeros(len(lengths), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        span = np.repeat(np.arange(len(lengths)), lengths)
+        index = starts[span] + 1 + (np.arange(lengths.sum()) - offsets[span])
+
+        # distance from each vertex to its span's chord
+        a = xy[starts[span]]
+        ab = xy[ends[span]] - a
+        ap = xy[index] - a
+        length2 = (ab * ab).sum(axis=1)
+        t = np.where(length2 > 0, (ap * ab).sum(axis=1) / np.where(length2 > 0, length2, 1), 0)
+        t = np.clip(t, 0, 1)
+        offset = ap - ab * t[:, None]
+        distance = np.sqrt((offset * offset).sum(axis=1))
+
+        # the farthest vertex in each span (the first one, if there's a tie)
+        farthest = np.maximum.reduceat(distance, offsets)
+        hits = np.flatnonzero(distance == farthest[span])
+        _, first = np.unique(span[hits], return_index=True)
+        vertex = index[hits[first]]
+
+        split = farthest > tolerance
+        vertex = vertex[split]
+        keep[vertex] = True
+        starts, ends = (
+            np.concatenate([starts[split], vertex]),
+            np.concatenate([vertex, ends[split]]),
+        )
+
+
+def simplify_lines(lines, tolerance, locked):
+    """
+    Simplifies a batch of lines (lists of positions) to within tolerance meters,
+    keeping any vertex whose key is in locked. Returns the simplified lines.
+    """
+    import numpy as np
+
+    arrays = [np.asarray(line, dtype=float)[:, :2] for line in lines]
+    lengths = np.array([len(array) for array in arrays])
+    first = np.zeros(len(lines), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=first[1:])
+    last = first + lengths - 1
+
+    positions = np.concatenate(arrays)
+    keep = np.isin(position_keys(positions), locked)
+    keep[first] = True
+    keep[last] = True
+
+    # project each line to meters around its mean latitude
+    mean_lat = np.add.reduceat(positions[:, 1], first) / lengths
+    scale = np.repeat(np.cos(np.radians(mean_lat)), lengths)
+    xy = positions * METERS_PER_DEGREE
+    xy[:, 0] *= scale
+
+    douglas_peucker(xy, keep, tolerance)
+
+    return [
+        [line[i] for i in np.flatnonzero(keep[start : end + 1])]
+        for line, start, end in zip(lines, first, last)
+    ]
+
+
+def simplify_features(features, tolerance, label="simplify", batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Simplifies the lines of features (see simplify_lines), yielding the features with
+    their simplified geometry. Vertex counts before and after are reported under label.
+    """
+    features = list(features)
+    locked = endpoint_keys(features)
+
+    for batch_start in range(0, len(features), batch_size):
+        batch = features[batch_start : batch_start + batch_size]
+
+        # lines with only two vertices have nothing to simplify
+        lines = [
+            line
+            for feature in batch
+            for line in line_parts(feature.get("geometry"))
+            if len(line) > 2
+        ]
+        simplified = simplify_lines(lines, tolerance, locked) if lines else []
+        stats.count_reduction(
+            f"{label} vertices", sum(map(len, lines)), sum(map(len, simplified))
+        )
+        simplified = iter(simplified)
+
+        for feature in batch:
+            geometry = feature.get("geometry")
+            parts = line_parts(geometry)
+            if not any(len(line) > 2 for line in parts):
+                yield feature
+                continue
+            parts = [next(simplified) if len(line) > 2 else line for line in parts]
+            if geometry["type"] == "LineString":
+                geometry = {"type": "LineString", "coordinates": parts[0]}
+            else:
+                geometry = {"type": "MultiLineString", "coordinates": parts}
+            yield {**feature, "geometry": geometry}
@@ -0,0 +1,119 @@
+"""
+Output writers for converted features.
+
+Each writer wraps a binary output stream and is used as a context manager: call write()
+once per feature, and the writer emits any header or footer its format needs on entry
+and exit. All writers stream, so memory use doesn't grow with the size of the output.
+"""
+
+import contextlib
+import sys
+
+from . import codec
+from .columnar import FlatGeobufWriter, GeoParquetWriter
+from .osmpbf import OsmPbfWriter
+from .osmxml import OsmXmlWriter
+
+# Output is written through a buffer this big, so the OS sees a few large writes
+# rather than one per feature
+BUFFER_SIZE = 1 << 20
+
+
+def open_output(path=None):
+    """
+    Opens path (or STDOUT, if path is None) for writing in binary mode with a large
+    buffer. Returns a context manager; STDOUT is flushed but not closed on exit.
+    """
+    if path:
+        return open(path, "wb", buffering=BUFFER_SIZE)
+    sys.stdout.flush()
+    return open(sys.stdout.fileno(), "wb", buffering=BUFFER_SIZE, closefd=False)
+
+
+class NdjsonWriter:
+    """Writes features as newline-delimited GeoJSON"""
+
+    # Text writers can also be given features that are already encoded as JSON, via
+    # write_encoded(), which lets the encoding happen elsewhere (e.g. in a worker)
+    encoded = True
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stream.flush()
+
+    def write(self, feature):
+        self.write_encoded(codec.dumps(feature))
+
+    def write_encoded(self, data):
+        self.stream.write(data)
+        self.stream.write(b"\n")
+
+
+class FeatureCollectionWriter(NdjsonWriter):
+    """
+    Writes features as a single GeoJSON FeatureCollection, one feature per line, without
+    holding the collection in memory.
+    """
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.first = True
+
+    def __enter__(self):
+        self.stream.write(b'{"type": "FeatureCollection", "features": [\n')
+        return self
+
+    def __exit__(self, *exc):
+        self.stream.write(b"\n]}\n")
+        super().__exit__(*exc)
+
+    def write_encoded(self, data):
+        if not self.first:
+            self.stream.write(b",\n")
+        self.first = False
+        self.stream.write(data)
+
+
+WRITERS = {
+    "ndjson": NdjsonWriter,
+    "geojson": FeatureCollectionWriter,
+    "osm": OsmXmlWriter,
+    "pbf": OsmPbfWriter,
+    "parquet": GeoParquetWriter,
+    "fgb": FlatGeobufWriter,
+}
+
+
+# File extensions for each format, for naming output files
+EXTENSIONS = {
+    "ndjson": ".osm.ndjson",
+    "geojson": ".osm.geojson",
+    "osm": ".osm",
+    "pbf": ".osm.pbf",
+    "parquet": ".parquet",
+    "fgb": ".fgb",
+}
+
+
+def open_writer(format, path=None):
+    """
+    Returns a writer for format, writing to path (or STDOUT, if path is None and the
+    format supports it). The writer is a context manager, which closes the output.
+    """
+    writer_class = WRITERS[format]
+    if getattr(writer_class, "needs_path", False):
+        if not path:
+            raise ValueError(f"{format} output can't be written to STDOUT")
+        return writer_class(path)
+    return _stream_writer(writer_class, path)
+
+
+@contextlib.contextmanager
+def _stream_writer(writer_class, path):
+    with open_output(path) as stream, writer_class(stream) as writer:
+        yield writer
@@ -0,0 +1,112 @@
+"""
+Feature sources for the converters.
+
+Features can be read either as newline-delimited GeoJSON (the historical interface,
+usually piped in on STDIN) or directly from any file GDAL can open, such as the
+FS File Geodatabases or a GeoJSON FeatureCollection. The latter is streamed in
+Arrow record batches using pyogrio, so no intermediate copies of the data are needed.
+"""
+
+import sys
+
+from . import codec, geometry
+
+NDJSON_SUFFIXES = (".ndjson", ".geojsonl", ".geojsons", ".jsonl")
+
+DEFAULT_BATCH_SIZE = 65536
+
+
+def is_ndjson(path):
+    return path == "-" or path.lower().endswith(NDJSON_SUFFIXES)
+
+
+def read_ndjson(lines, bbox=None):
+    """Yields GeoJSON features from lines of newline-delimited GeoJSON"""
+    for line in lines:
+        if not line.strip():
+            continue
+        feature = codec.loads(line)
+        if bbox is None or geometry.intersects_bbox(feature["geometry"], bbox):
+            yield feature
+
+
+def read_lines(path, accepts_line=None):
+    """
+    Yields the raw lines (as bytes) of a newline-delimited GeoJSON file, or of STDIN
+    for "-". If accepts_line is given, only lines it returns True for are yielded.
+    """
+    if path == "-":
+        yield from filter(accepts_line, sys.stdin.buffer) if accepts_line else sys.stdin.buffer
+    else:
+        with open(path, "rb") as f:
+            yield from filter(accepts_line, f) if accepts_line else f
+
+
+def read_batches(path, layer=None, bbox=None, batch_size=DEFAULT_BATCH_SIZE, where=None):
+    """
+    Opens a GDAL-readable dataset and yields (geometry_column, pyarrow.RecordBatch)
+    pairs. The geometry column holds WKB. bbox is applied by GDAL (using the layer's
+    spatial index where there is one) and is in the layer's coordinate system; for
+    the FS datasets that's geographic NAD83, which is close enough to WGS84 for
+    selecting an extent. where is an SQL WHERE clause that GDAL selects features with.
+    """
+    try:
+        from pyogrio.raw import open_arrow
+    except ImportError as e:
+        raise RuntimeError(
+            f"reading {path} requires the pyogrio and pyarrow packages"
+        ) from e
+
+    with open_arrow(
+        path,
+        layer=layer,
+        bbox=tuple(bbox) if bbox else None,
+        where=where,
+        batch_size=batch_size,
+        use_pyarrow=True,
+    ) as (meta, reader):
+        geometry_name = geometry_column(reader.schema, meta["geometry_name"])
+        for batch in reader:
+            yield geometry_name, batch
+
+
+def geometry_column(schema, default=None):
+    """
+    Finds the WKB geometry column in an Arrow schema from GDAL. It's tagged with the
+    geoarrow.wkb extension type; if the layer doesn't name its geometry column, GDAL
+    calls it "wkb_geometry".
+    """
+    for field in schema:
+        if (field.metadata or {}).get(b"ARROW:extension:name") == b"geoarrow.wkb":
+            return field.name
+    return default or "wkb_geometry"
+
+
+def batch_to_features(geometry_name, batch):
+    """Converts a record batch with a WKB geometry column to GeoJSON features"""
+    names = [name for name in batch.schema.names if name != geometry_name]
+    columns = [batch.column(name).to_pylist() for name in names]
+    geometries = batch.column(geometry_name).to_pylist()
+
+    for wkb, *values in zip(geometries, *columns):
+        yield {
+            "type": "Feature",
+            "properties": dict(zip(names, values)),
+            "geometry": geometry.from_wkb(wkb),
+        }
+
+
+def read_features(
+    path, layer=None, bbox=None, batch_size=DEFAULT_BATCH_SIZE, accepts_line=None, where=None
+):
+    """
+    Yields GeoJSON features from path, which may be "-" for newline-delimited GeoJSON
+    on STDIN, an ndjson file, or any dataset GDAL can read (.gdb, .geojson, ...).
+    accepts_line filters newline-delimited GeoJSON lines before they're decoded (see
+    read_lines), and where filters other formats as they're read (see read_batches).
+    """
+    if is_ndjson(path):
+        yield from read_ndjson(read_lines(path, accepts_line), bbox)
+    else:
+        for geometry_name, batch in read_batches(path, layer, bbox, batch_size, where):
+            yield from batch_to_features(geometry_name, batch)
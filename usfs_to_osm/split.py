@@ -0,0 +1,68 @@
+"""
+Splitting of lines with more vertices than OSM allows in a single way.
+
+The OSM API rejects ways with more than 2000 nodes, so long lines (especially merged
+roads) are split into several features whose ends overlap by one vertex, keeping the
+pieces connected. The coordinates of a line that needs splitting are copied into a
+NumPy array once, and each piece is a slice of it.
+"""
+
+from . import stats
+
+
+def split_coordinates(coordinates, max_nodes):
+    """
+    Splits a line's coordinates into pieces of at most max_nodes positions, where each
+    piece starts with the last position of the one before. Returns a list of arrays.
+    """
+    import numpy as np
+
+    positions = np.asarray(coordinates, dtype=float)
+    step = max_nodes - 1
+    return [positions[start : start + max_nodes] for start in range(0, len(positions) - 1, step)]
+
+
+def split_feature(feature, max_nodes):
+    """
+    Returns a list of features for feature, splitting any line with more than max_nodes
+    vertices. A long LineString becomes several LineString features with the same
+    properties; long parts of a MultiLineString are split in place.
+    """
+    geometry = feature.get("geometry")
+    if geometry is None:
+        return [feature]
+
+    if geometry["type"] == "LineString":
+        if len(geometry["coordinates"]) <= max_nodes:
+            return [feature]
+        pieces = split_coordinates(geometry["coordinates"], max_nodes)
+        stats.count("split: lines split")
+        stats.count("split: extra ways", len(pieces) - 1)
+        return [
+            {**feature, "geometry": {"type": "LineString", "coordinates": piece.tolist()}}
+            for piece in pieces
+        ]
+
+    if geometry["type"] == "MultiLineString":
+        if all(len(part) <= max_nodes for part in geometry["coordinates"]):
+            return [feature]
+        parts = []
+        for part in geometry["coordinates"]:
+            if len(part) <= max_nodes:
+                parts.append(part)
+                continue
+            pieces = split_coordinates(part, max_nodes)
+            stats.count("split: lines split")
+            stats.count("split: extra ways", len(pieces) - 1)
+            parts.extend(piece.tolist() for piece in pieces)
+        return [{**feature, "geometry": {"type": "MultiLineString", "coordinates": parts}}]
+
+    return [feature]
+
+
+def split_features(features, max_nodes):
+    """Yields features, with any lines over max_nodes vertices split (see split_feature)"""
+    if max_nodes < 2:
+        raise ValueError("ways need at least 2 nodes")
+    for feature in features:
+        yield from split_feature(feature, max_nodes)
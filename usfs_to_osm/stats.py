@@ -0,0 +1,108 @@
+"""
+Counters describing a conversion run, reported on STDERR at the end with --verbose.
+
+Worker processes keep their own counters; they hand what they've counted since the
+last chunk back with each chunk's results (see take()), and the main process adds
+them up with merge().
+"""
+
+import collections
+import functools
+import sys
+
+counters = collections.Counter()
+
+# Functions wrapped with functools.lru_cache, whose hits and misses we report
+caches = {}
+
+# Labels of counts that are reported as a reduction (see count_reduction)
+reductions = set()
+
+_taken = collections.Counter()
+_merged = collections.Counter()
+
+
+def count(key, n=1):
+    counters[key] += n
+
+
+def count_reduction(label, before, after):
+    """Counts something that a stage reduced (e.g. vertices), reported as a percentage"""
+    reductions.add(label)
+    counters[f"{label} before"] += before
+    counters[f"{label} after"] += after
+
+
+def count_time(label, seconds, n=1):
+    """Counts n things that took seconds to process, reported with their throughput"""
+    counters[f"{label} count"] += n
+    counters[f"{label} seconds"] += seconds
+
+
+def cached(label, maxsize):
+    """Decorator that memoizes a function in a bounded LRU cache, and reports its stats"""
+
+    def decorator(function):
+        function = functools.lru_cache(maxsize=maxsize)(function)
+        caches[label] = function
+        return function
+
+    return decorator
+
+
+def snapshot():
+    """Returns all counts from this process, including those of registered caches"""
+    totals = collections.Counter(counters)
+    for label, function in caches.items():
+        info = function.cache_info()
+        totals[f"{label} cache hits"] += info.hits
+        totals[f"{label} cache misses"] += info.misses
+    return totals
+
+
+def take():
+    """Returns the counts accumulated in this process since the last call to take()"""
+    global _taken
+    totals = snapshot()
+    delta = totals - _taken
+    _taken = totals
+    return delta
+
+
+def merge(delta):
+    """Adds counts taken in another process"""
+    _merged.update(delta)
+
+
+def report(file=sys.stderr):
+    totals = snapshot() + _merged
+    reported = set()
+
+    for label in caches:
+        hits = totals[f"{label} cache hits"]
+        misses = totals[f"{label} cache misses"]
+        reported |= {f"{label} cache hits", f"{label} cache misses"}
+        rate = hits / (hits + misses) if hits + misses else 0
+        print(f"{label} cache: {hits} hits, {misses} misses ({rate:.1%} hit rate)", file=file)
+
+    for label in sorted(reductions):
+        before = totals[f"{label} before"]
+        after = totals[f"{label} after"]
+        reported |= {f"{label} before", f"{label} after"}
+        saved = 1 - after / before if before else 0
+        print(f"{label}: {before} -> {after} ({saved:.1%} fewer)", file=file)
+
+    # these are found by key, since they may only have been counted in the workers
+    for key in sorted(totals):
+        if not key.endswith(" seconds"):
+            continue
+        label = key.removesuffix(" seconds")
+        count = totals[f"{label} count"]
+        seconds = totals[key]
+        reported |= {f"{label} count", key}
+        rate = count / seconds if seconds else 0
+        print(f"{label}: {count} in {seconds * 1000:.1f} ms ({rate:,.0f}/s)", file=file)
+
+    for key, value in sorted(totals.items()):
+        if key not in reported:
+            print(f"{key}: {value}", file=file)
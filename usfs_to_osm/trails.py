@@ -0,0 +1,364 @@
+"""
+Conversion of USDA National Forest System Trails ('S_USA.TrailNFS') attributes to
+OSM-compatible tags.
+"""
+
+import collections
+import datetime
+import functools
+
+from . import names, schema, stats
+from .names import NameNormalizer
+
+# Columns the input must have; any others that are missing are treated as null
+REQUIRED_COLUMNS = ("TRAIL_NAME", "TRAIL_NO")
+
+ABBREVIATIONS = {
+    "N": "North",
+    "S": "South",
+    "SO": "South",
+    "E": "East",
+    "W": "West",
+    "MT": "Mount",
+    "MTN": "Mountian",
+    "NTL": "National",
+    "NATL": "National",
+    "CG": "Campground",
+    "CK": "Creek",
+    "CR": "Creek",
+    "CRK": "Creek",
+    "CYN": "Canyon",
+    "FK": "Fork",
+    "I.T.": "Interpretive Trail", # include only I.T., not IT (the word 'it')
+    "LK": "Lake",
+    "LKS": "Lakes",
+    "PK": "Park",
+    "RD": "Road",
+    "ST": "Saint",
+    "TR": "Trail",
+    "SMT": "Snowmobile Trail",
+    "HWT": "Hunter Walking Trail",
+    "NRT": "National Recreation Trail",
+    "NST": "National Scenic Trail",
+
+    # specific long distance trail names
+    "PCT": "Pacific Crest Trail",
+    "PCNST": "Pacific Crest National Scenic Trail",
+    "CDT": "Continental Divide Trail",
+    "GWT": "Great Western Trail",
+    "INHT": "Iditarod National Historic Trail",
+    "TRT": "Tahoe Rim Trail",
+    "FNST": "Florida National Scenic Trail",
+    "LSHT": "Lone Star Hiking Trail",
+    "MCCT": "Michigan Cross-Country Cycle Trail",
+    "MCCCT": "Michigan Cross-Country Cycle Trail",
+}
+
+SPECIAL_CASES = {
+    "ATV": "ATV",
+    "OHV": "OHV",
+    "XC": "XC",
+    "OF": "of",
+    "THE": "the",
+    "IN": "in",
+    "TO": "to",
+}
+
+BAD_WORDS = {
+    # "Filler" words to delete from names
+    "FDR",
+}
+
+BAD_NAMES = {
+    # "Names" that should be considered equivalent to null values
+    "NO NAME",
+    "UNNAMED",
+    "UN-NAMED",
+    "UNKNOWN",
+    "LOCAL",
+    "MAJOR LOCAL",
+    "HUC", # some roads near Rainier, meaning unknown
+    "(FDR)", # Forest Development Road
+    "MRS", # Minimum Road System
+    "2B DECOMM'D", # to be decommissioned
+    
+}
+
+# ALLOWED_TERRA_USE values
+HIKER_PEDESTRIAN = 1
+PACK_AND_SADDLE = 2
+BICYCLE = 3
+MOTORCYCLE = 4
+ATV = 5
+FOUR_WHEEL_DRIVE_GT_50 = 6
+
+def use_mask(*uses):
+    """Returns the bitmask with a bit set for each of the given ALLOWED_TERRA_USE values"""
+    mask = 0
+    for use in uses:
+        mask |= 1 << use
+    return mask
+
+# Trails open to vehicles this big are tracks rather than paths
+TRACK_USES = use_mask(ATV, FOUR_WHEEL_DRIVE_GT_50)
+
+def _parse_terra_use(val):
+    if val and val.isnumeric():
+        return use_mask(*(int(digit) for digit in val))
+    else:
+        return None
+
+# ALLOWED_TERRA_USE is a string of the digits of the allowed uses, in order, so there
+# are only a few dozen possible values; they're all decoded to a bitmask up front, and
+# anything else is decoded the first time it's seen and added to the table
+TERRA_USE_MASKS = {
+    "".join(str(use) for use in range(1, 7) if subset & (1 << use)): subset
+    for subset in range(0, 1 << 7, 2)
+}
+TERRA_USE_MASKS.update({"": None, None: None})
+
+def allowed_terra_use(props):
+    """Returns the ALLOWED_TERRA_USE values as a bitmask (see use_mask), or None"""
+    val = props.get("ALLOWED_TERRA_USE")
+    try:
+        return TERRA_USE_MASKS[val]
+    except KeyError:
+        mask = TERRA_USE_MASKS[val] = _parse_terra_use(val)
+        return mask
+    
+
+def highway(props):
+    if props.get("TRAIL_TYPE") == "TERRA":
+        allowed = allowed_terra_use(props)
+        if allowed is not None and allowed & TRACK_USES:
+            return "track"
+        else:
+            return "path"
+    else:
+        return None
+
+
+def name(props):
+    return normalize_name(props["TRAIL_NAME"], props["TRAIL_NO"])
+
+
+NAME_NORMALIZER = NameNormalizer(
+    ABBREVIATIONS,
+    special_cases=SPECIAL_CASES,
+    bad_words=BAD_WORDS,
+    bad_names=BAD_NAMES,
+    bad_name_patterns=names.BAD_NAME_PATTERNS,
+    suffix="Trail",
+    suffix_words={"Road", "Trail", "Connector", "Tie", "Loop", "Spur"},
+)
+
+
+@stats.cached("trails name", maxsize=65536)
+def normalize_name(name, id):
+    # Trails are split into many segments with the same name, so this is memoized
+    # on the only two columns it depends on
+    return NAME_NORMALIZER(name, id)
+
+def ref(props):
+    ref = props["TRAIL_NO"]
+
+    if ref.startswith("T"):
+        ref = ref[1:]
+    if ref.startswith("O-"):
+        ref = ref[2:]
+    
+    return ref
+
+ACCESS_TAG_TO_COLUMN_MAP = {
+    "foot": "HIKER_PEDESTRIAN",
+    "bicycle": "BICYCLE",
+    "horse": "PACK_SADDLE",
+    "motorcycle": "MOTORCYCLE",
+    "atv": "ATV",
+    "motorcar": "FOURWD_GT50INCHES",
+    "snowmobile": "SNOWMOBILE",
+}
+
+# Each mode has three columns, giving the date ranges (e.g. "05/01-06/30,09/01-10/31")
+# when the trail is managed for the mode, when the mode is accepted or discouraged,
+# and when it's restricted. They're listed here in order of precedence, with the
+# access value each one means.
+ACCESS_LEVELS = (
+    ("_MANAGED", "designated"),
+    ("_ACCPT_DISC", "yes"),
+    ("_RESTRICTED", "no"),
+)
+
+# The columns for each mode, in the order of ACCESS_LEVELS
+ACCESS_COLUMNS = {
+    mode: tuple(prefix + suffix for suffix, _ in ACCESS_LEVELS)
+    for mode, prefix in ACCESS_TAG_TO_COLUMN_MAP.items()
+}
+
+CONDITIONAL_KEYS = {mode: mode + ":conditional" for mode in ACCESS_TAG_TO_COLUMN_MAP}
+
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# Days of the year are numbered from 1 to 366, as in 2000 (a leap year, so Feb 29 is
+# a valid date). Sets of days are bitmasks, with bit day - 1 set for each day.
+YEAR = (1 << 366) - 1
+
+def day_mask(first, last):
+    """Returns the bitmask of the days from first to last (inclusive)"""
+    return ((1 << (last - first + 1)) - 1) << (first - 1)
+
+# Date ranges as an interval: the set of days they cover, and the OSM opening_hours
+# style condition they make (e.g. "May 01-Jun 30,Sep 01-Oct 31")
+DateRanges = collections.namedtuple("DateRanges", ["days", "condition"])
+
+def format_day(day):
+    date = datetime.date(2000, 1, 1) + datetime.timedelta(days=day - 1)
+    return f"{MONTHS[date.month - 1]} {date.day:02d}"
+
+@stats.cached("trails date ranges format", maxsize=4096)
+def format_days(days):
+    """Formats a set of days as an OSM opening_hours style list of date ranges"""
+    runs = []
+    for day in range(1, 367):
+        if not days >> (day - 1) & 1:
+            continue
+        if runs and runs[-1][1] == day - 1:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    if len(runs) > 1 and runs[0][0] == 1 and runs[-1][1] == 366:
+        # one range wraps around the end of the year
+        runs[0][0] = runs.pop()[0]
+    return ",".join(f"{format_day(first)}-{format_day(last)}" for first, last in runs)
+
+@stats.cached("trails date ranges", maxsize=4096)
+def parse_date_ranges(text):
+    """
+    Parses a comma-separated list of MM/DD-MM/DD date ranges (which may wrap around
+    the end of the year) into DateRanges, or returns None if text isn't one
+    """
+    days = 0
+    conditions = []
+    for part in text.split(","):
+        try:
+            start, end = part.strip().split("-")
+            first = datetime.date(2000, *map(int, start.split("/")))
+            last = datetime.date(2000, *map(int, end.split("/")))
+        except (TypeError, ValueError):
+            return None
+        first_day, last_day = first.timetuple().tm_yday, last.timetuple().tm_yday
+        if first_day <= last_day:
+            days |= day_mask(first_day, last_day)
+        else:
+            days |= day_mask(first_day, 366) | day_mask(1, last_day)
+        conditions.append(f"{format_day(first_day)}-{format_day(last_day)}")
+    return DateRanges(days, ",".join(conditions))
+
+@stats.cached("trails mode access", maxsize=4096)
+def mode_access(mode, values):
+    """
+    Returns the access tags for a mode, as (key, value) pairs, given the values of its
+    ACCESS_COLUMNS. Each level applies on the days in its ranges that no
+    higher-precedence level covers. The first level that covers the rest of the year
+    gives the plain access tag, and the levels above it give a conditional restriction
+    for the days they apply on.
+    """
+    # Each mode's columns take only a few distinct combinations of values, even when
+    # whole rows of access columns (see access_template) are all different
+    tags = []
+    conditions = []
+    covered = 0
+    for (_, access), text in zip(ACCESS_LEVELS, values):
+        ranges = parse_date_ranges(text) if text else None
+        if ranges is None:
+            continue
+        if covered | ranges.days == YEAR:
+            tags.append((mode, access))
+            break
+        days = ranges.days & ~covered
+        if not days:
+            # hidden by the levels above
+            continue
+        condition = ranges.condition if days == ranges.days else format_days(days)
+        conditions.append(f"{access} @ ({condition})")
+        covered |= days
+
+    if conditions:
+        # The last condition that matches wins, so they're listed from lowest
+        # precedence to highest
+        tags.append((CONDITIONAL_KEYS[mode], "; ".join(reversed(conditions))))
+    return tuple(tags)
+
+# Every mode's access columns, in one tuple
+ALL_ACCESS_COLUMNS = tuple(column for columns in ACCESS_COLUMNS.values() for column in columns)
+
+# Where each mode's columns are in ALL_ACCESS_COLUMNS
+ACCESS_SLICES = tuple(
+    (mode, slice(3 * i, 3 * i + 3)) for i, mode in enumerate(ACCESS_COLUMNS)
+)
+
+@stats.cached("trails access", maxsize=65536)
+def access_template(values):
+    """
+    Computes the access tags of every mode, given a tuple of the values of
+    ALL_ACCESS_COLUMNS. Returns a dict that's shared between calls, so it mustn't be
+    modified (it isn't a MappingProxyType, since copying from one of those is much
+    slower).
+    """
+    # Trails in the same area tend to share seasons, so there are far fewer distinct
+    # combinations of these columns than trails
+    tags = {}
+    for mode, columns in ACCESS_SLICES:
+        tags.update(mode_access(mode, values[columns]))
+    return tags
+
+def access_tags(props, access_values=None):
+    """Returns the access tags for props, as a shared dict (see access_template)"""
+    # TODO: this ignores ALLOWED_TERRA_USE - is that okay?
+    if access_values is None:
+        values = tuple(map(props.get, ALL_ACCESS_COLUMNS))
+    else:
+        values = access_values(props)
+    return access_template(values)
+
+
+def operator(props):
+    return "US Forest Service"
+
+
+def properties_to_osm(props, access_values=None):
+    """
+    Converts a feature properties dict to OSM tags. access_values fetches the values of
+    ALL_ACCESS_COLUMNS from props (see specialize); by default they're looked up by name.
+    """
+    tags = {}
+    # tags = {**props}
+    tags["TRAIL_NAME"] = props["TRAIL_NAME"]
+    tags["TRAIL_NO"] = props["TRAIL_NO"]
+
+    tags["highway"] = highway(props)
+    tags["name"] = name(props)
+    tags["ref"] = ref(props)
+    tags["operator"] = operator(props)
+
+    tags.update(access_tags(props, access_values))
+  
+    return tags
+
+
+def feature_to_osm(feature, access_values=None):
+    """Converts a single GeoJSON feature to OSM-compatible form"""
+    feature["properties"] = properties_to_osm(feature["properties"], access_values)
+    return feature
+
+
+def specialize(columns, fixed=False):
+    """
+    Checks that an input with the given columns can be converted, and returns a
+    feature_to_osm function with its column accessors built for them. fixed is whether
+    every feature has exactly those columns (see schema.getter).
+    """
+    schema.check_columns("trails", columns, REQUIRED_COLUMNS)
+    return functools.partial(
+        feature_to_osm, access_values=schema.getter(columns, ALL_ACCESS_COLUMNS, fixed)
+    )